@@ -0,0 +1,294 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+from dotenv import load_dotenv
+
+from analyzer_output import run_to_spool, extract_slither_results
+from slither_pool import SlitherWorkerPool, SlitherPoolError, SlitherPoolTimeout, available_cores
+from linters import load_lint_rules, run_pattern_linter, run_solc_warnings
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Warm Slither worker pool, set SLITHER_POOL_SIZE=0 to always use the CLI
+SLITHER_POOL_SIZE = int(os.environ.get("SLITHER_POOL_SIZE", str(available_cores())))
+SLITHER_WORKER_MAX_JOBS = int(os.environ.get("SLITHER_WORKER_MAX_JOBS", "50"))
+SLITHER_WORKER_MAX_RSS_MB = float(os.environ.get("SLITHER_WORKER_MAX_RSS_MB", "1024"))
+SLITHER_TIMEOUT = float(os.environ.get("SLITHER_TIMEOUT", "300"))
+# Analyzer stdout is spooled to disk and the job fails beyond this size
+ANALYZER_OUTPUT_MAX_MB = int(os.environ.get("ANALYZER_OUTPUT_MAX_MB", "64"))
+# Analyzers run by simple verification, concurrently
+SIMPLE_ANALYZERS = [name.strip() for name in os.environ.get("SIMPLE_ANALYZERS", "slither,solc,lint").split(",") if name.strip()]
+# Analyzer runs allowed at once across all verifications
+ANALYZER_CPU_BUDGET = int(os.environ.get("ANALYZER_CPU_BUDGET", str(available_cores())))
+SOLC_BINARY = os.environ.get("SOLC_BINARY", "solc")
+SOLC_TIMEOUT = float(os.environ.get("SOLC_TIMEOUT", "60"))
+# JSON file with custom lint rules, the built-in rules are used when unset
+LINT_RULES_PATH = os.environ.get("LINT_RULES_PATH")
+
+# Slither detector profiles, from fastest to most thorough.
+# "quick" only runs high-impact detectors so results can be shown within seconds.
+SLITHER_QUICK_DETECTORS = [
+    "reentrancy-eth",
+    "arbitrary-send-eth",
+    "arbitrary-send-erc20",
+    "controlled-delegatecall",
+    "suicidal",
+    "unprotected-upgrade",
+    "uninitialized-state",
+    "uninitialized-storage",
+    "weak-prng",
+    "tx-origin",
+]
+
+SLITHER_PROFILES = {
+    "quick": ["--detect", ",".join(SLITHER_QUICK_DETECTORS)],
+    "standard": ["--exclude-informational", "--exclude-optimization"],
+    "exhaustive": [],
+    # Everything the quick profile does not cover, used for the second pass of progressive scans
+    "deep": ["--exclude", ",".join(SLITHER_QUICK_DETECTORS)],
+}
+
+_slither_pool = None
+
+def get_slither_pool() -> Optional[SlitherWorkerPool]:
+    """Return the shared Slither worker pool, creating it on first use"""
+    global _slither_pool
+    if SLITHER_POOL_SIZE <= 0:
+        return None
+    if _slither_pool is None:
+        _slither_pool = SlitherWorkerPool(
+            size=SLITHER_POOL_SIZE,
+            max_jobs=SLITHER_WORKER_MAX_JOBS,
+            max_rss_mb=SLITHER_WORKER_MAX_RSS_MB,
+            job_timeout=SLITHER_TIMEOUT
+        )
+    return _slither_pool
+
+def run_slither_analysis(contract_file_path: str, profile: str = "exhaustive") -> Dict[str, Any]:
+    """Run Slither analysis on the smart contract using the given detector profile
+
+    Uses a warm worker from the Slither pool when available and falls back to
+    spawning the slither CLI if the pool is disabled or broken.
+    """
+    if profile not in SLITHER_PROFILES:
+        return {"error": f"Unknown Slither profile: {profile}"}
+    logger.info(f"Running Slither analysis ({profile} profile) on {contract_file_path}")
+    started = time.monotonic()
+
+    pool = get_slither_pool()
+    if pool is not None:
+        try:
+            slither_results = pool.run(contract_file_path, SLITHER_PROFILES[profile])
+            slither_results["profile"] = profile
+            slither_results["duration"] = round(time.monotonic() - started, 3)
+            logger.info(f"Slither analysis ({profile} profile) completed on worker pool in {slither_results['duration']}s")
+            return slither_results
+        except SlitherPoolTimeout as e:
+            logger.error(f"Slither analysis timed out: {str(e)}")
+            return {"error": str(e), "profile": profile, "duration": round(time.monotonic() - started, 3)}
+        except SlitherPoolError as e:
+            logger.warning(f"Slither worker pool unavailable, falling back to CLI: {str(e)}")
+
+    try:
+        result = run_to_spool(
+            ["slither", contract_file_path, *SLITHER_PROFILES[profile], "--json", "-"],
+            max_bytes=ANALYZER_OUTPUT_MAX_MB * 1024 * 1024,
+            timeout=SLITHER_TIMEOUT
+        )
+        
+        try:
+            if result.returncode != 0 and not result.stdout_size:
+                logger.error(f"Slither analysis failed: {result.stderr_tail}")
+                return {"error": result.stderr_tail, "profile": profile, "duration": round(time.monotonic() - started, 3)}
+            
+            slither_results = extract_slither_results(result.stdout)
+        finally:
+            result.close()
+        slither_results["profile"] = profile
+        slither_results["duration"] = round(time.monotonic() - started, 3)
+        logger.info(f"Slither analysis ({profile} profile) completed in {slither_results['duration']}s")
+        return slither_results
+    except Exception as e:
+        logger.error(f"Error running Slither: {str(e)}")
+        return {"error": f"Error running Slither: {str(e)}", "profile": profile, "duration": round(time.monotonic() - started, 3)}
+
+def get_slither_detectors(slither_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the list of detector findings from a Slither JSON report"""
+    if not isinstance(slither_results, dict):
+        return []
+    return (slither_results.get("results") or {}).get("detectors") or []
+
+def slither_findings_to_issues(detectors: List[Dict[str, Any]], start_index: int = 1) -> List[Dict[str, Any]]:
+    """Map raw Slither detector findings to the issue structure used in verification results
+
+    This is a deterministic mapping used to publish early results before the AI
+    step has produced the polished report.
+    """
+    type_map = {"High": "error", "Medium": "warning"}
+    severity_map = {"High": "high", "Medium": "medium"}
+    issues = []
+    for index, finding in enumerate(detectors, start=start_index):
+        impact = finding.get("impact", "Informational")
+        lines = []
+        file_name = ""
+        for element in finding.get("elements", []):
+            source_mapping = element.get("source_mapping") or {}
+            if source_mapping.get("lines"):
+                lines = [source_mapping["lines"][0]]
+                file_name = os.path.basename(source_mapping.get("filename_short", ""))
+                break
+        description = (finding.get("description") or "").strip()
+        issues.append({
+            "id": f"issue-{index}",
+            "type": type_map.get(impact, "info"),
+            "title": finding.get("check", "slither-finding").replace("-", " ").title(),
+            "description": description,
+            "line": lines,
+            "file": file_name,
+            "severity": severity_map.get(impact, "low")
+        })
+    return issues
+
+def slither_finding_key(finding: Dict[str, Any]) -> tuple:
+    """Key used to deduplicate findings across Slither passes"""
+    return (finding.get("check"), finding.get("id") or finding.get("description"))
+
+_cpu_budget = threading.BoundedSemaphore(max(1, ANALYZER_CPU_BUDGET))
+# Analyzer runs of the app wait here, not on the event loop's default thread
+# pool, which index lookups, AI calls and type checks need too
+_analyzer_executor = ThreadPoolExecutor(max_workers=max(1, ANALYZER_CPU_BUDGET), thread_name_prefix="analyzer")
+
+@contextmanager
+def cpu_slot():
+    """Hold one slot of the analyzer CPU budget shared by all verifications"""
+    with _cpu_budget:
+        yield
+
+_lint_rules = None
+
+def run_analyzer(name: str, contract_file_path: str, profile: str = "exhaustive",
+                 queued_at: Optional[float] = None) -> Dict[str, Any]:
+    """Run one analyzer within the CPU budget and return its report in the Slither shape
+
+    Every finding is tagged with the analyzer that produced it. Errors are
+    returned in the report instead of raised, like run_slither_analysis.
+    """
+    global _lint_rules
+    started = time.monotonic()
+    # Time spent queued on the analyzer executor counts as budget wait too
+    queued_at = queued_at or started
+    try:
+        with span("analyzer", name, profile=profile) as analyzer_span, cpu_slot():
+            analyzer_span.set(budget_wait=round(time.monotonic() - queued_at, 6))
+            if name == "slither":
+                report = run_slither_analysis(contract_file_path, profile)
+            elif name == "solc":
+                report = run_solc_warnings(contract_file_path, SOLC_BINARY, SOLC_TIMEOUT)
+            elif name == "lint":
+                if _lint_rules is None:
+                    _lint_rules = load_lint_rules(LINT_RULES_PATH)
+                report = run_pattern_linter(contract_file_path, _lint_rules)
+            else:
+                report = {"error": f"Unknown analyzer: {name}"}
+    except Exception as e:
+        logger.error(f"Error running {name}: {str(e)}")
+        report = {"error": f"Error running {name}: {str(e)}"}
+    for finding in get_slither_detectors(report):
+        finding.setdefault("analyzer", name)
+    report["analyzer"] = name
+    report["duration"] = report.get("duration") or round(time.monotonic() - started, 3)
+    return report
+
+async def run_analyzer_async(name: str, contract_file_path: str, profile: str = "exhaustive") -> Dict[str, Any]:
+    """run_analyzer on the analyzer executor, sized to the CPU budget"""
+    # Carry the caller's context (and its job profile) into the executor thread
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _analyzer_executor,
+        functools.partial(context.run, run_analyzer, name, contract_file_path, profile, time.monotonic())
+    )
+
+IMPACT_ORDER = {"High": 3, "Medium": 2, "Low": 1, "Informational": 0, "Optimization": 0}
+
+def finding_location(finding: Dict[str, Any]) -> tuple:
+    """File and first/last source line covered by a finding's elements"""
+    file_name, lines = None, []
+    for element in finding.get("elements", []):
+        source_mapping = element.get("source_mapping") or {}
+        element_lines = [line for line in source_mapping.get("lines") or [] if isinstance(line, int)]
+        if element_lines:
+            file_name = file_name or os.path.basename(source_mapping.get("filename_short") or "")
+            lines.extend(element_lines)
+    if not lines:
+        return (file_name, None, None)
+    return (file_name, min(lines), max(lines))
+
+def finding_location_key(finding: Dict[str, Any]) -> tuple:
+    """Root cause and first source line of a finding"""
+    file_name, first_line, _ = finding_location(finding)
+    if first_line is None:
+        return (finding.get("root_cause") or finding.get("check"), None, finding.get("id") or finding.get("description"))
+    return (finding.get("root_cause") or finding.get("check"), file_name, first_line)
+
+def _finding_rank(finding: Dict[str, Any]) -> tuple:
+    return (IMPACT_ORDER.get(finding.get("impact"), 0), finding.get("analyzer") == "slither")
+
+def _covers(current: Dict[str, Any], finding: Dict[str, Any]) -> bool:
+    """Whether finding reports the same root cause inside current's line range"""
+    root_cause = finding.get("root_cause") or finding.get("check")
+    if root_cause != (current.get("root_cause") or current.get("check")):
+        return False
+    if finding.get("analyzer") in current["analyzers"]:
+        # Two findings of one analyzer are distinct unless they start on the same line
+        return finding_location_key(finding) == finding_location_key(current)
+    file_name, first_line, last_line = finding_location(finding)
+    current_file, current_first, current_last = current["location"]
+    if first_line is None or current_first is None:
+        return finding_location_key(finding) == finding_location_key(current)
+    return file_name == current_file and current_first <= first_line and last_line <= current_last
+
+def merge_findings(reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge findings of several analyzers, one per root cause and location
+
+    A statement-level finding (a solc warning, a lint match) joins a finding
+    with the same root cause whose line range contains it, e.g. the function
+    Slither flagged. The finding with the highest impact is kept (Slither's on
+    ties, being the most detailed) and lists every analyzer that reported it.
+    """
+    findings = [finding for report in reports for finding in get_slither_detectors(report)]
+
+    def width(finding):
+        _, first_line, last_line = finding_location(finding)
+        return -1 if first_line is None else last_line - first_line
+
+    merged = []
+    # Widest ranges first so statement-level findings find the finding covering them
+    for order, finding in sorted(enumerate(findings), key=lambda item: width(item[1]), reverse=True):
+        for index, current in enumerate(merged):
+            if not _covers(current, finding):
+                continue
+            analyzers = current["analyzers"] + [a for a in [finding.get("analyzer")] if a not in current["analyzers"]]
+            if _finding_rank(finding) > _finding_rank(current):
+                current = {**finding, "location": current["location"], "order": current["order"]}
+            merged[index] = {**current, "analyzers": analyzers, "order": min(order, current["order"])}
+            break
+        else:
+            merged.append({**finding, "analyzers": [finding.get("analyzer")], "location": finding_location(finding), "order": order})
+    # Back in report order
+    merged.sort(key=lambda finding: finding["order"])
+    return [{key: value for key, value in finding.items() if key not in ("location", "order")} for finding in merged]
+
+def shutdown_slither_pool():
+    """Stop the warm Slither workers, if any were started"""
+    if _slither_pool is not None:
+        _slither_pool.shutdown()
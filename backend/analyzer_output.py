@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import subprocess
+from typing import Optional, Dict, Any, List, IO
+
+try:
+    import ijson
+except ImportError:  # without ijson the spool file is parsed in one go, still bounded by the cap
+    ijson = None
+
+from certora_parser import find_line_hint
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+STDERR_TAIL_BYTES = 16 * 1024
+
+
+class OutputTooLarge(Exception):
+    """Raised when a tool writes more than the allowed amount of output"""
+
+
+class SpooledRun:
+    """Result of run_to_spool: exit code, the stdout spool file and the tail of stderr"""
+
+    def __init__(self, returncode: int, stdout: IO[bytes], stdout_size: int, stderr_tail: str):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stdout_size = stdout_size
+        self.stderr_tail = stderr_tail
+
+    def close(self):
+        self.stdout.close()
+
+
+def run_to_spool(cmd: List[str], max_bytes: int, timeout: Optional[float] = None,
+                 cwd: Optional[str] = None, poll_interval: float = 0.2) -> SpooledRun:
+    """Run a command with stdout written to a temporary file instead of memory
+
+    The process is killed if stdout grows beyond max_bytes (OutputTooLarge) or
+    it runs longer than timeout (subprocess.TimeoutExpired). Only the last
+    STDERR_TAIL_BYTES of stderr are kept.
+    """
+    stdout_file = tempfile.TemporaryFile()
+    with span("subprocess", " ".join(os.path.basename(part) for part in cmd[:2])) as process_span, \
+            tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, stdout=stdout_file, stderr=stderr_file, cwd=cwd)
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                try:
+                    process.wait(timeout=poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if stdout_file.tell() > max_bytes:
+                    raise OutputTooLarge(f"{cmd[0]} output exceeded {max_bytes // (1024 * 1024)} MB")
+                if deadline and time.monotonic() > deadline:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+        except BaseException:
+            process.kill()
+            process.wait()
+            stdout_file.close()
+            raise
+
+        stdout_size = stdout_file.tell()
+        process_span.set(returncode=process.returncode, stdout_bytes=stdout_size, stderr_bytes=stderr_file.tell())
+        if stdout_size > max_bytes:
+            stdout_file.close()
+            raise OutputTooLarge(f"{cmd[0]} output exceeded {max_bytes // (1024 * 1024)} MB")
+
+        stderr_size = stderr_file.tell()
+        stderr_file.seek(max(0, stderr_size - STDERR_TAIL_BYTES))
+        stderr_tail = stderr_file.read().decode(errors="replace")
+
+    stdout_file.seek(0)
+    return SpooledRun(process.returncode, stdout_file, stdout_size, stderr_tail)
+
+
+def slim_slither_finding(finding: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the parts of a Slither finding used by later stages"""
+    elements = []
+    for element in finding.get("elements", []):
+        source_mapping = element.get("source_mapping") or {}
+        elements.append({
+            "type": element.get("type"),
+            "name": element.get("name"),
+            "source_mapping": {
+                "filename_short": source_mapping.get("filename_short"),
+                # The full range lets single-line reports of other analyzers merge into this finding
+                "lines": source_mapping.get("lines") or []
+            }
+        })
+    return {
+        "check": finding.get("check"),
+        "impact": finding.get("impact"),
+        "confidence": finding.get("confidence"),
+        "description": finding.get("description"),
+        "id": finding.get("id"),
+        "elements": elements
+    }
+
+
+def extract_slither_results(stream: IO[bytes]) -> Dict[str, Any]:
+    """Parse `slither --json -` output, building one slimmed finding at a time"""
+    if ijson is None:
+        report = json.load(stream)
+        detectors = (report.get("results") or {}).get("detectors") or []
+        return {
+            "success": report.get("success"),
+            "error": report.get("error"),
+            "results": {"detectors": [slim_slither_finding(finding) for finding in detectors]}
+        }
+
+    summary = _top_level_scalars(stream, ("success", "error"))
+    stream.seek(0)
+    detectors = [slim_slither_finding(finding) for finding in ijson.items(stream, "results.detectors.item", use_float=True)]
+    return {"success": summary.get("success"), "error": summary.get("error"), "results": {"detectors": detectors}}
+
+
+def slim_certora_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep a rule's verdict fields and replace its call trace with the first source location"""
+    slim = {
+        key: rule.get(key)
+        for key in ("name", "ruleName", "status", "assertMessage", "message", "ruleType", "type")
+        if key in rule
+    }
+    call_trace = rule.get("callTrace") or rule.get("jumpToDefinition")
+    hint = find_line_hint(call_trace) if call_trace else None
+    if hint:
+        slim["callTrace"] = {"file": hint[0], "line": hint[1]}
+    if rule.get("children"):
+        slim["children"] = [slim_certora_rule(child) for child in rule["children"] if isinstance(child, dict)]
+    return slim
+
+
+def _top_level_scalars(stream: IO[bytes], keys: tuple) -> Dict[str, Any]:
+    """Scalar values of top level keys, read from parser events without building containers"""
+    found = {}
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if prefix in keys and event in ("boolean", "string", "number", "null"):
+            found[prefix] = value
+            if len(found) == len(keys):
+                break
+    return found
+
+
+def _top_level_type(stream: IO[bytes], key: str) -> Optional[str]:
+    """Event type ("start_array", "start_map", ...) of a top level key, without building it"""
+    for prefix, event, _ in ijson.parse(stream, use_float=True):
+        if prefix == key and event != "map_key":
+            return event
+    return None
+
+
+def extract_certora_results(stream: IO[bytes]) -> Dict[str, Any]:
+    """Parse certoraRun JSON output keeping only what the Certora parser needs"""
+    if ijson is None:
+        report = json.load(stream)
+        result = {key: report[key] for key in ("success", "error", "assertMessages") if key in report}
+        rules = report.get("rules")
+        if isinstance(rules, list):
+            result["rules"] = [slim_certora_rule(rule) for rule in rules if isinstance(rule, dict)]
+        elif rules is not None:
+            result["rules"] = rules
+        return result
+
+    result = _top_level_scalars(stream, ("success", "error"))
+    stream.seek(0)
+    for assert_messages in ijson.items(stream, "assertMessages", use_float=True):
+        result["assertMessages"] = assert_messages
+    stream.seek(0)
+    rules_type = _top_level_type(stream, "rules")
+    stream.seek(0)
+    if rules_type == "start_array":
+        result["rules"] = [slim_certora_rule(rule) for rule in ijson.items(stream, "rules.item", use_float=True) if isinstance(rule, dict)]
+    elif rules_type is not None:
+        # Legacy format maps rule names to verdict strings, which is small
+        for rules in ijson.items(stream, "rules", use_float=True):
+            result["rules"] = rules
+    return result
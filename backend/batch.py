@@ -0,0 +1,145 @@
+"""Offline batch verification of Solidity files
+
+Runs the analyzers and normalization stages of simple verification over a
+directory or glob of .sol files, in parallel on the warm Slither worker pool.
+Needs neither Supabase nor network access. Results are streamed as one JSON
+object per line and a summary is printed to stderr at the end.
+
+Usage:
+    python batch.py contracts/ "audits/**/*.sol" --profile standard --workers 8 --output results.jsonl
+
+Findings stored with --warm-index are keyed by the analyzers and profile
+that produced them, so the app only reuses them when the batch ran what
+simple verification runs (the default analyzers and exhaustive profile).
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+def collect_sources(patterns: List[str]) -> List[str]:
+    """Expand directories, globs and file paths into a sorted list of .sol files"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, "**", "*.sol"), recursive=True))
+        elif os.path.isfile(pattern):
+            files.add(pattern)
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if path.endswith(".sol"))
+    return sorted(os.path.abspath(path) for path in files)
+
+
+def analyze_file(path: str, profile: str, analyzers: List[str], finding_index=None) -> Dict[str, Any]:
+    """Run the analyzers on one file and normalize their merged findings into issues"""
+    from analysis import run_analyzer, merge_findings, get_slither_detectors, slither_findings_to_issues
+
+    reports = [run_analyzer(name, path, profile) for name in analyzers]
+    detectors = merge_findings(reports)
+    record = {
+        "file": path,
+        "profile": profile,
+        "analyzers": analyzers,
+        "duration": round(sum(report.get("duration") or 0 for report in reports), 3),
+        "issues": slither_findings_to_issues(detectors)
+    }
+    # Successful Slither reports carry "error": null
+    errors = [f"{name}: {report['error']}" for name, report in zip(analyzers, reports) if report.get("error")]
+    if errors:
+        record["error"] = "; ".join(errors)
+    elif finding_index is not None:
+        from finding_index import function_fingerprints, findings_kind
+        with open(path) as source:
+            finding_index.store_findings(function_fingerprints(source.read()), detectors, findings_kind(analyzers, profile))
+    return record
+
+
+def summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    severities = {}
+    for record in records:
+        for issue in record["issues"]:
+            severities[issue["severity"]] = severities.get(issue["severity"], 0) + 1
+    failed = sum(1 for record in records if "error" in record)
+    return {
+        "files": len(records),
+        "succeeded": len(records) - failed,
+        "failed": failed,
+        "issues": sum(len(record["issues"]) for record in records),
+        "by_severity": severities,
+        "elapsed": round(elapsed, 3),
+        "files_per_second": round(len(records) / elapsed, 3) if elapsed else None
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the analyzers over a directory or glob of Solidity files")
+    parser.add_argument("paths", nargs="+", help="Directories, globs or .sol files")
+    parser.add_argument("--profile", default="exhaustive", choices=["quick", "standard", "exhaustive"],
+                        help="Slither detector profile")
+    parser.add_argument("--analyzers", default=None,
+                        help="Comma separated analyzers to run (default: SIMPLE_ANALYZERS, like simple verification)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of Slither workers (default: available cores)")
+    parser.add_argument("--output", default="-", help="JSONL output file, '-' for stdout")
+    parser.add_argument("--warm-index", metavar="PATH", default=None,
+                        help="Store normalized findings in the finding index at PATH")
+    args = parser.parse_args(argv)
+
+    # Must be set before analysis is imported, it sizes the worker pool from the environment
+    if args.workers:
+        os.environ["SLITHER_POOL_SIZE"] = str(args.workers)
+    from analysis import SLITHER_POOL_SIZE, SIMPLE_ANALYZERS, shutdown_slither_pool
+    workers = max(1, args.workers or SLITHER_POOL_SIZE or 1)
+    analyzers = [name.strip() for name in args.analyzers.split(",") if name.strip()] if args.analyzers else SIMPLE_ANALYZERS
+
+    finding_index = None
+    if args.warm_index:
+        from finding_index import FindingIndex
+        finding_index = FindingIndex(args.warm_index)
+        if args.profile != "exhaustive" or sorted(analyzers) != sorted(SIMPLE_ANALYZERS):
+            logger.warning(f"Warming the index with the {args.profile} profile and {','.join(analyzers)}; "
+                           f"simple verification only reuses findings of the exhaustive profile and {','.join(SIMPLE_ANALYZERS)}")
+
+    files = collect_sources(args.paths)
+    if not files:
+        print("No .sol files found", file=sys.stderr)
+        return 1
+    logger.info(f"Analyzing {len(files)} files with {workers} workers")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    records = []
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(analyze_file, path, args.profile, analyzers, finding_index): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {"file": futures[future], "profile": args.profile, "analyzers": analyzers, "issues": [], "error": str(e)}
+                records.append(record)
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        shutdown_slither_pool()
+        if finding_index is not None:
+            finding_index.close()
+
+    summary = summarize(records, time.monotonic() - started)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
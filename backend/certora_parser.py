@@ -0,0 +1,206 @@
+import os
+import re
+from typing import Optional, Dict, Any, List
+
+# Prover verdicts normalized across the legacy output.json format ("rules": {name: status},
+# parametric rules as {status: [methods]}) and the newer report format ("rules": [{"name", "status", "children", ...}])
+VERDICT_ALIASES = {
+    "SUCCESS": "verified",
+    "VERIFIED": "verified",
+    "PASSED": "verified",
+    "FAIL": "violated",
+    "FAILED": "violated",
+    "VIOLATED": "violated",
+    "TIMEOUT": "timeout",
+    "SANITY_FAIL": "sanity_failed",
+    "SANITY_FAILED": "sanity_failed",
+    "VACUOUS": "sanity_failed",
+    "ERROR": "error",
+    "UNKNOWN": "unknown",
+}
+
+# (type, severity) for each verdict; invariant violations are escalated to critical
+VERDICT_CLASSIFICATION = {
+    "violated": ("error", "high"),
+    "timeout": ("warning", "medium"),
+    "sanity_failed": ("warning", "medium"),
+    "error": ("warning", "medium"),
+    "unknown": ("info", "low"),
+}
+
+INVARIANT_PATTERN = re.compile(r"^\s*invariant\s+(\w+)", re.MULTILINE)
+
+
+def normalize_verdict(status: Any) -> str:
+    """Map a raw prover status to one of our verdict names"""
+    if not isinstance(status, str):
+        return "unknown"
+    return VERDICT_ALIASES.get(status.strip().upper(), "unknown")
+
+
+def invariant_names(cvl_code: Optional[str]) -> set:
+    """Names declared with `invariant` in the CVL spec"""
+    if not cvl_code:
+        return set()
+    return set(INVARIANT_PATTERN.findall(cvl_code))
+
+
+def find_line_hint(call_trace: Any) -> Optional[tuple]:
+    """Return the first (file, line) in a call trace that points into a Solidity source"""
+    stack = [call_trace]
+    while stack:
+        node = stack.pop(0)
+        if isinstance(node, dict):
+            file_name = node.get("file") or node.get("fileName")
+            line = node.get("line") or node.get("lineNumber")
+            if isinstance(file_name, str) and file_name.endswith(".sol") and isinstance(line, int):
+                return os.path.basename(file_name), line
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None
+
+
+def collect_rule_verdicts(certora_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten the prover output into one entry per rule, invariant or parametric instance"""
+    rules = certora_results.get("rules")
+    assert_messages = certora_results.get("assertMessages") or {}
+    verdicts = []
+
+    if isinstance(rules, dict):
+        for name, status in rules.items():
+            if isinstance(status, dict):
+                # Parametric rule: {status: [method signatures]}
+                for method_status, methods in status.items():
+                    for method in methods if isinstance(methods, list) else [methods]:
+                        verdicts.append({
+                            "name": name,
+                            "method": method,
+                            "verdict": normalize_verdict(method_status),
+                            "message": assert_messages.get(name),
+                            "call_trace": None,
+                            "rule_type": None
+                        })
+            else:
+                verdicts.append({
+                    "name": name,
+                    "method": None,
+                    "verdict": normalize_verdict(status),
+                    "message": assert_messages.get(name),
+                    "call_trace": None,
+                    "rule_type": None
+                })
+
+    elif isinstance(rules, list):
+        def visit(node, parent_name=None):
+            name = node.get("name") or node.get("ruleName") or parent_name
+            children = node.get("children") or []
+            if children and parent_name is None:
+                for child in children:
+                    visit(child, name)
+                return
+            verdicts.append({
+                "name": parent_name or name,
+                "method": name if parent_name else None,
+                "verdict": normalize_verdict(node.get("status")),
+                "message": node.get("assertMessage") or node.get("message"),
+                "call_trace": node.get("callTrace") or node.get("jumpToDefinition"),
+                "rule_type": node.get("ruleType") or node.get("type")
+            })
+
+        for rule in rules:
+            if isinstance(rule, dict):
+                visit(rule)
+
+    return verdicts
+
+
+def describe_verdict(entry: Dict[str, Any], kind: str) -> tuple:
+    """Deterministic title and description for a failing verdict"""
+    target = f"{kind} `{entry['name']}`"
+    if entry["method"]:
+        target += f" for `{entry['method']}`"
+    verdict = entry["verdict"]
+
+    if verdict == "violated":
+        title = f"{kind.capitalize()} {entry['name']} Violated"
+        description = f"The prover found a counterexample to the {target}."
+        if entry["message"]:
+            description += f" Failed assertion: {entry['message']}."
+        description += " Review the call trace and the state changes it exercises."
+    elif verdict == "timeout":
+        title = f"{kind.capitalize()} {entry['name']} Timed Out"
+        description = (f"The prover could not decide the {target} within its time limit. "
+                       "Consider splitting the property or adding summaries for complex calls.")
+    elif verdict == "sanity_failed":
+        title = f"{kind.capitalize()} {entry['name']} Is Vacuous"
+        description = (f"The sanity check failed for the {target}, so it passes trivially. "
+                       "Its preconditions are likely unsatisfiable and should be revisited.")
+    elif verdict == "error":
+        title = f"{kind.capitalize()} {entry['name']} Could Not Be Checked"
+        description = f"The prover reported an error while checking the {target}."
+        if entry["message"]:
+            description += f" {entry['message']}"
+    else:
+        title = f"{kind.capitalize()} {entry['name']} Has Unknown Status"
+        description = f"The prover did not report a conclusive result for the {target}."
+    return title, description
+
+
+def parse_certora_results(certora_results: Dict[str, Any], cvl_code: Optional[str] = None,
+                          contract_file: str = "") -> Dict[str, Any]:
+    """Convert certoraRun output into the issue structure used for verification results
+
+    Every non-verified rule or invariant becomes one issue with a deterministic
+    severity. Line hints are taken from the call trace when the prover provides one.
+    """
+    logs = ["Deep verification initiated", "Generating formal specifications",
+            "Specifications confirmed by user", "Running formal verification",
+            "Analyzing contract properties"]
+
+    if not isinstance(certora_results, dict):
+        return {"results": [], "logs": logs + ["Unrecognized prover output"],
+                "error": "Unrecognized Certora Prover output"}
+
+    if certora_results.get("success") is False and "rules" not in certora_results:
+        error = certora_results.get("error") or "Certora Prover failed"
+        return {"results": [], "logs": logs + ["Formal verification failed"], "error": error}
+
+    invariants = invariant_names(cvl_code)
+    default_file = os.path.basename(contract_file) if contract_file else ""
+    issues = []
+    verified = 0
+
+    verdicts = collect_rule_verdicts(certora_results)
+    if not verdicts:
+        # e.g. empty stdout from certoraRun, which is not evidence that anything was verified
+        error = certora_results.get("error") or "Certora Prover reported no rule verdicts"
+        return {"results": [], "logs": logs + ["No verification results reported"], "error": error}
+
+    for entry in verdicts:
+        if entry["verdict"] == "verified":
+            verified += 1
+            continue
+
+        is_invariant = entry["name"] in invariants or str(entry["rule_type"]).lower() == "invariant"
+        kind = "invariant" if is_invariant else "rule"
+        issue_type, severity = VERDICT_CLASSIFICATION[entry["verdict"]]
+        if is_invariant and entry["verdict"] == "violated":
+            severity = "critical"
+
+        title, description = describe_verdict(entry, kind)
+        hint = find_line_hint(entry["call_trace"])
+        issues.append({
+            "id": f"issue-{len(issues) + 1}",
+            "type": issue_type,
+            "title": title,
+            "description": description,
+            "line": [hint[1]] if hint else [],
+            "file": hint[0] if hint else default_file,
+            "severity": severity
+        })
+
+    logs.append(f"{verified} properties verified")
+    logs.append(f"Found {len(issues)} issues")
+    logs.append("Verification completed")
+    return {"results": issues, "logs": logs}
@@ -0,0 +1,134 @@
+import logging
+from typing import Optional, Dict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding, honouring q-values (q=0 means not acceptable)"""
+    weights = parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # Prefer brotli on equal weights since it compresses JSON better
+    best = max(candidates, key=lambda coding: (weights.get(coding, wildcard), coding == "br"))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+class BrotliResponder:
+    """Streams a response through a brotli compressor, like Starlette's GZipResponder does for gzip"""
+
+    def __init__(self, app, minimum_size: int, quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send = None
+        self.initial_message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if self.compressor is None:
+            self.compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            # Flush so every streamed chunk reaches the client as it is produced
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+    async def send_with_brotli(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk shows how to modify them
+            self.initial_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+        elif message_type != "http.response.body":
+            await self.send(message)
+        elif self.passthrough:
+            # Never double-encode, just forward as-is
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+        elif not self.started:
+            self.started = True
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) < self.minimum_size and not more_body:
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            message["body"] = self.compress(body, more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+        else:
+            message["body"] = self.compress(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses responses above a size threshold
+
+    Negotiates brotli or gzip from the q-values in Accept-Encoding. gzip is
+    handled by Starlette's GZipMiddleware and brotli by BrotliResponder; both
+    compress streamed responses chunk by chunk instead of buffering them, and
+    pass through responses that are already encoded or smaller than
+    minimum_size.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send)
+        elif encoding == "gzip":
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -0,0 +1,72 @@
+import re
+from typing import Optional, Dict, List, Tuple
+
+from spec_chunker import extract_spec_items, normalize_spec_item
+
+# CVL generated for a numbered spec item is preceded by this marker comment
+SPEC_MARKER_PATTERN = re.compile(r"^\s*//\s*spec\s+(\d+)\b.*$", re.MULTILINE | re.IGNORECASE)
+
+SPEC_MARKER_INSTRUCTION = """
+        Before the CVL written for each numbered specification, add a comment line of the form `// spec <number>` using the number from the list. Put shared declarations (methods block, ghosts, definitions) before the first `// spec` comment."""
+
+
+def split_cvl_by_spec(cvl_code: str) -> Tuple[str, Dict[int, str]]:
+    """Split CVL into its shared preamble and the block generated for each spec item number"""
+    markers = list(SPEC_MARKER_PATTERN.finditer(cvl_code))
+    if not markers:
+        return cvl_code, {}
+    preamble = cvl_code[:markers[0].start()]
+    blocks = {}
+    for index, marker in enumerate(markers):
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(cvl_code)
+        number = int(marker.group(1))
+        # Several markers with the same number are kept together
+        blocks[number] = blocks.get(number, "") + cvl_code[marker.start():end]
+    return preamble, blocks
+
+
+def renumber_block(block: str, number: int) -> str:
+    # A block may hold several markers of its item, all of them move with it
+    return SPEC_MARKER_PATTERN.sub(f"// spec {number}", block)
+
+
+def plan_spec_edit(draft_spec: str, approved_spec: str, blocks: Dict[int, str]) -> Tuple[Dict[int, str], List[Tuple[int, str]]]:
+    """Work out which approved items can reuse a speculative CVL block
+
+    Returns the reusable blocks keyed by their new item number and the list
+    of (number, text) items that were edited or added and need new CVL.
+    """
+    draft_numbers = {}
+    for number, item in enumerate(extract_spec_items(draft_spec), start=1):
+        draft_numbers.setdefault(normalize_spec_item(item), number)
+
+    reused = {}
+    edited = []
+    for number, item in enumerate(extract_spec_items(approved_spec), start=1):
+        draft_number = draft_numbers.get(normalize_spec_item(item))
+        if draft_number is not None and draft_number in blocks:
+            reused[number] = renumber_block(blocks[draft_number], number)
+        else:
+            edited.append((number, item))
+    return reused, edited
+
+
+def assemble_cvl(preamble: str, blocks: Dict[int, str]) -> str:
+    """Join the preamble and per item blocks in item order"""
+    parts = [preamble.rstrip()] if preamble.strip() else []
+    parts.extend(blocks[number].strip() for number in sorted(blocks))
+    return "\n\n".join(parts) + "\n"
+
+
+def merge_edited_cvl(preamble: str, reused: Dict[int, str], edited_cvl: str,
+                     edited: List[Tuple[int, str]]) -> Optional[str]:
+    """Combine reused blocks with freshly generated ones; None if any edited item is missing"""
+    edited_preamble, new_blocks = split_cvl_by_spec(edited_cvl)
+    if any(number not in new_blocks for number, _ in edited):
+        return None
+    blocks = dict(reused)
+    blocks.update({number: new_blocks[number] for number, _ in edited})
+    # Keep any new shared declarations the edited items rely on
+    if edited_preamble.strip() and edited_preamble.strip() not in preamble:
+        preamble = preamble.rstrip() + "\n\n" + edited_preamble.strip()
+    return assemble_cvl(preamble, blocks)
@@ -0,0 +1,278 @@
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from spec_chunker import mask_comments_and_strings, split_solidity_source, find_block_end
+
+logger = logging.getLogger(__name__)
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_$][\w$]*")
+ELEMENTARY_TYPE_PATTERN = re.compile(r"^(u?int\d*|bytes\d*|fixed\w*|ufixed\w*)$")
+MODIFIER_PATTERN = re.compile(r"\bmodifier\s+(\w+)")
+FUNCTION_NAME_PATTERN = re.compile(r"\bfunction\s+(\w+)")
+CALL_PATTERN = re.compile(r"\b(\w+)\s*\(")
+
+# Identifiers kept verbatim when fingerprinting: keywords, types and global members
+SOLIDITY_RESERVED = {
+    "abstract", "address", "anonymous", "as", "assembly", "assert", "bool", "break", "calldata",
+    "catch", "constant", "constructor", "continue", "contract", "delete", "do", "else", "emit",
+    "enum", "error", "event", "external", "fallback", "false", "for", "function", "if",
+    "immutable", "import", "indexed", "interface", "internal", "is", "library", "mapping",
+    "memory", "modifier", "new", "override", "payable", "pragma", "private", "public", "pure",
+    "receive", "require", "return", "returns", "revert", "storage", "string", "struct", "super",
+    "this", "true", "try", "type", "unchecked", "using", "view", "virtual", "while",
+    "msg", "sender", "value", "data", "sig", "block", "timestamp", "number", "chainid",
+    "coinbase", "basefee", "tx", "origin", "gasprice", "gasleft", "abi", "encode",
+    "encodePacked", "encodeWithSelector", "encodeWithSignature", "encodeCall", "decode",
+    "keccak256", "sha256", "ecrecover", "selfdestruct", "call", "delegatecall", "staticcall",
+    "transfer", "send", "balance", "code", "codehash", "length", "push", "pop", "max", "min",
+    "wei", "gwei", "ether", "seconds", "minutes", "hours", "days", "weeks",
+}
+
+
+def normalize_function(source: str, rename_identifiers: bool = True) -> str:
+    """Canonical form of a function: no comments or whitespace, identifiers renamed by position
+
+    Spec and CVL fragments mention the original names, so they are keyed with
+    rename_identifiers=False.
+    """
+    masked = mask_comments_and_strings(source)
+    if not rename_identifiers:
+        return re.sub(r"\s+", " ", re.sub(r"\s*([^\w\s])\s*", r"\1", masked)).strip()
+    names = {}
+
+    def rename(match):
+        word = match.group(0)
+        if word in SOLIDITY_RESERVED or ELEMENTARY_TYPE_PATTERN.match(word):
+            return word
+        if word not in names:
+            names[word] = f"v{len(names)}"
+        return names[word]
+
+    renamed = IDENTIFIER_PATTERN.sub(rename, masked)
+    # Drop whitespace entirely except where it separates two word characters
+    return re.sub(r"\s+", " ", re.sub(r"\s*([^\w\s])\s*", r"\1", renamed)).strip()
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def modifier_sources(code: str) -> Dict[str, List[str]]:
+    """Source of every modifier in the file by name (several when contracts reuse a name)"""
+    masked = mask_comments_and_strings(code)
+    modifiers = {}
+    for match in MODIFIER_PATTERN.finditer(masked):
+        brace = masked.find("{", match.end())
+        semicolon = masked.find(";", match.end())
+        if brace == -1 or (semicolon != -1 and semicolon < brace):
+            end = semicolon + 1 if semicolon != -1 else len(masked)
+        else:
+            end = find_block_end(masked, brace)
+        modifiers.setdefault(match.group(1), []).append(code[match.start():end])
+    return modifiers
+
+
+def dependency_source(source: str, modifiers: Dict[str, List[str]], functions: Dict[str, List[str]]) -> str:
+    """Modifiers applied by a function and functions it calls, transitively, in canonical form
+
+    A function's findings depend on this code too (an access control modifier,
+    an internal helper), so it is part of the function's fingerprint.
+    Modifier names are kept since renaming would make onlyOwner and
+    whenNotPaused look alike.
+    """
+    dependencies = set()
+    pending = [source]
+    while pending:
+        masked = mask_comments_and_strings(pending.pop())
+        brace = masked.find("{")
+        signature = masked if brace == -1 else masked[:brace]
+        for name in IDENTIFIER_PATTERN.findall(signature):
+            if name in modifiers and ("modifier", name) not in dependencies:
+                dependencies.add(("modifier", name))
+                pending.extend(modifiers[name])
+        for name in CALL_PATTERN.findall(masked if brace == -1 else masked[brace:]):
+            if name in functions and ("function", name) not in dependencies:
+                dependencies.add(("function", name))
+                pending.extend(functions[name])
+    parts = []
+    for kind, name in sorted(dependencies):
+        bodies = modifiers[name] if kind == "modifier" else functions[name]
+        parts.extend(f"{kind} {name}:{normalize_function(body)}" for body in bodies)
+    return "\n".join(sorted(parts))
+
+
+def function_fingerprints(code: str) -> List[Dict[str, Any]]:
+    """Fingerprint every function in the source along with the line range it covers
+
+    A fingerprint covers the function and the modifiers and functions it
+    depends on. The code outside of functions (pragmas, state variables,
+    events, modifiers...) gets one extra "layout" entry so contract-level
+    findings are indexed too.
+    """
+    units = split_solidity_source(code)
+    modifiers = modifier_sources(code)
+    named = {}
+    for unit in units:
+        for source in unit["functions"]:
+            name = FUNCTION_NAME_PATTERN.search(mask_comments_and_strings(source))
+            if name:
+                named.setdefault(name.group(1), []).append(source)
+
+    functions = []
+    layout = code
+    for unit in units:
+        for source, offset in zip(unit["functions"], unit["function_offsets"]):
+            start_line = code.count("\n", 0, offset) + 1
+            functions.append({
+                "contract": unit["name"],
+                "fingerprint": fingerprint(normalize_function(source) + "\n" + dependency_source(source, modifiers, named)),
+                "start_line": start_line,
+                "end_line": start_line + source.count("\n")
+            })
+            layout = layout.replace(source, "", 1)
+    functions.append({
+        "contract": None,
+        "fingerprint": fingerprint("layout:" + normalize_function(layout)),
+        "start_line": 1,
+        "end_line": None
+    })
+    return functions
+
+
+def findings_kind(analyzers: List[str], profile: str) -> str:
+    """Index kind for findings produced by a set of analyzers with a Slither profile
+
+    Findings are only reused by runs with the same analyzers and profile,
+    otherwise a narrower run would stand in for a broader one.
+    """
+    return f"findings:{profile}:{','.join(sorted(analyzers))}"
+
+
+def finding_first_line(finding: Dict[str, Any]) -> Optional[int]:
+    for element in finding.get("elements", []):
+        lines = (element.get("source_mapping") or {}).get("lines")
+        if lines and isinstance(lines[0], int):
+            return lines[0]
+    return None
+
+
+def neutral_issue(finding: Dict[str, Any]) -> Dict[str, Any]:
+    """Issue for an analyzer finding built from its check and impact only
+
+    Descriptions name the project's contracts, functions and variables, so
+    they are left out of the shared index.
+    """
+    impact = finding.get("impact") or "Informational"
+    check = finding.get("check") or "finding"
+    analyzers = ", ".join(a for a in finding.get("analyzers") or [finding.get("analyzer") or "slither"] if a)
+    return {
+        "check": check,
+        "type": {"High": "error", "Medium": "warning"}.get(impact, "info"),
+        "title": check.replace("-", " ").title(),
+        "description": f"{analyzers} reported {check} ({impact} impact) on this line; review it before deployment.",
+        "severity": {"High": "high", "Medium": "medium"}.get(impact, "low")
+    }
+
+
+def function_for_line(functions: List[Dict[str, Any]], line: Optional[int]) -> Optional[Dict[str, Any]]:
+    """The function covering a line, or the layout entry for lines outside any function"""
+    layout = None
+    for function in functions:
+        if function["end_line"] is None:
+            layout = function
+        elif line is not None and function["start_line"] <= line <= function["end_line"]:
+            return function
+    return layout
+
+
+class FindingIndex:
+    """Cross-project index of previously computed results keyed by normalized fingerprints
+
+    Entries store the findings of a function (with lines relative to the start
+    of the function), or a generated spec or CVL fragment, so near-identical
+    code submitted by other projects can reuse them without re-analysis.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """create table if not exists fingerprints (
+                fingerprint text not null,
+                kind text not null,
+                payload text not null,
+                hits integer not null default 0,
+                updated_at text not null,
+                primary key (fingerprint, kind)
+            )"""
+        )
+        self.connection.commit()
+
+    def get(self, key: str, kind: str) -> Optional[Any]:
+        with self.lock:
+            row = self.connection.execute(
+                "select payload from fingerprints where fingerprint = ? and kind = ?", (key, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "update fingerprints set hits = hits + 1 where fingerprint = ? and kind = ?", (key, kind)
+            )
+            self.connection.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, payload: Any):
+        with self.lock:
+            self.connection.execute(
+                """insert into fingerprints (fingerprint, kind, payload, updated_at) values (?, ?, ?, ?)
+                on conflict (fingerprint, kind) do update set payload = excluded.payload, updated_at = excluded.updated_at""",
+                (key, kind, json.dumps(payload), datetime.now().isoformat())
+            )
+            self.connection.commit()
+
+    def lookup_findings(self, functions: List[Dict[str, Any]], kind: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Cached findings for each known function fingerprint, with lines made absolute again
+
+        Functions without stored findings are left out: a function with no
+        finding is not known to be clean, it has to be analyzed.
+        """
+        matched = {}
+        for function in functions:
+            findings = self.get(function["fingerprint"], kind)
+            if not findings:
+                continue
+            matched[function["fingerprint"]] = [
+                {**finding, "line": [function["start_line"] + offset for offset in finding.get("line", [])]}
+                for finding in findings
+            ]
+        return matched
+
+    def store_findings(self, functions: List[Dict[str, Any]], detectors: List[Dict[str, Any]], kind: str):
+        """Attribute analyzer findings to the functions covering their first line and record them per fingerprint
+
+        Only deterministic analyzer output is stored, as neutral issues with
+        lines relative to the function, never the AI report, whose entries
+        group several findings and name the project's identifiers.
+        """
+        per_function = {}
+        for finding in detectors:
+            line = finding_first_line(finding)
+            function = function_for_line(functions, line)
+            if function is None:
+                continue
+            relative = neutral_issue(finding)
+            relative["line"] = [line - function["start_line"]] if line is not None else []
+            per_function.setdefault(function["fingerprint"], []).append(relative)
+        for key, findings in per_function.items():
+            self.put(key, kind, findings)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
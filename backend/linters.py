@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import bisect
+import shutil
+import logging
+import subprocess
+from typing import Optional, Dict, Any, List
+
+from spec_chunker import mask_comments_and_strings
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+# Pattern rules for the lint analyzer. A regex match is weaker evidence than
+# Slither's analysis, so checks get their own lint-* names and low impact;
+# root_cause names the Slither detector a match corroborates when both report
+# the same statement.
+DEFAULT_LINT_RULES = [
+    {"check": "lint-tx-origin", "root_cause": "tx-origin", "pattern": r"\btx\.origin\b", "impact": "Low",
+     "description": "tx.origin is used; authorization based on it can be bypassed by a malicious intermediate contract."},
+    {"check": "lint-selfdestruct", "root_cause": "suicidal", "pattern": r"\b(selfdestruct|suicide)\s*\(", "impact": "Low",
+     "description": "selfdestruct is used; make sure it is restricted to trusted callers."},
+    {"check": "lint-delegatecall", "root_cause": "controlled-delegatecall", "pattern": r"\.delegatecall\s*\(", "impact": "Low",
+     "description": "delegatecall executes foreign code with this contract's storage; the target must be trusted."},
+    {"check": "lint-low-level-call", "root_cause": "low-level-calls", "pattern": r"\.call\s*(\{[^}]*\})?\s*\(", "impact": "Informational",
+     "description": "Low-level call; check its return value and guard against reentrancy."},
+    {"check": "lint-timestamp", "root_cause": "timestamp", "pattern": r"\bblock\.timestamp\b|\bnow\b", "impact": "Informational",
+     "description": "block.timestamp can be influenced by validators and should not decide critical logic."},
+    {"check": "lint-block-randomness", "root_cause": "weak-prng", "pattern": r"\b(blockhash|block\.(prevrandao|difficulty))\b", "impact": "Low",
+     "description": "Block values are predictable; make sure they are not used as a source of randomness."},
+    {"check": "lint-assembly", "root_cause": "assembly", "pattern": r"\bassembly\s*(\"[^\"]*\"\s*)?\{", "impact": "Informational",
+     "description": "Inline assembly bypasses Solidity's safety checks and needs careful review."},
+    {"check": "lint-floating-pragma", "root_cause": "solc-version", "pattern": r"pragma\s+solidity\s*[\^>~]", "impact": "Informational",
+     "description": "Floating pragma; pin the compiler version used for testing and deployment."},
+]
+
+# solc warning codes that describe the same problem as a Slither detector,
+# used to merge the two reports. The findings keep their solc-* names.
+SOLC_ROOT_CAUSES = {
+    "9302": "unchecked-lowlevel",
+    "5878": "unchecked-send",
+    "2319": "shadowing-builtin",
+    "2519": "shadowing-local",
+    "8760": "shadowing-local",
+}
+
+
+def line_starts(code: str) -> List[int]:
+    return [0] + [match.end() for match in re.finditer("\n", code)]
+
+
+def offset_to_line(starts: List[int], offset: int) -> int:
+    return bisect.bisect_right(starts, offset)
+
+
+def make_finding(analyzer: str, check: str, impact: str, description: str, file_name: str,
+                 line: Optional[int], confidence: str = "Medium", root_cause: Optional[str] = None) -> Dict[str, Any]:
+    """Finding in the slimmed Slither shape so every analyzer feeds the same pipeline"""
+    return {
+        "check": check,
+        "root_cause": root_cause or check,
+        "impact": impact,
+        "confidence": confidence,
+        "description": description,
+        "id": None,
+        "analyzer": analyzer,
+        "elements": [{
+            "type": "source",
+            "name": None,
+            "source_mapping": {"filename_short": file_name, "lines": [line] if line else []}
+        }]
+    }
+
+
+def load_lint_rules(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Lint rules from a JSON file (a list of check/pattern/impact/description objects), or the defaults"""
+    if not path:
+        return DEFAULT_LINT_RULES
+    with open(path) as rules_file:
+        rules = json.load(rules_file)
+    for rule in rules:
+        missing = {"check", "pattern"} - set(rule)
+        if missing:
+            raise ValueError(f"Lint rule is missing {', '.join(sorted(missing))}: {rule}")
+    return rules
+
+
+def run_pattern_linter(contract_file_path: str, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Match the lint rules against the source with comments and strings masked out"""
+    with open(contract_file_path) as source:
+        code = source.read()
+    masked = mask_comments_and_strings(code)
+    starts = line_starts(code)
+    file_name = os.path.basename(contract_file_path)
+    findings = []
+    for rule in rules:
+        reported = set()
+        for match in re.finditer(rule["pattern"], masked):
+            line = offset_to_line(starts, match.start())
+            if line in reported:
+                continue
+            reported.add(line)
+            findings.append(make_finding(
+                "lint", rule["check"], rule.get("impact", "Informational"),
+                f"{rule.get('description', rule['check'])} ({file_name}#{line})", file_name, line, "Low",
+                rule.get("root_cause")
+            ))
+    return {"success": True, "results": {"detectors": findings}}
+
+
+def solc_check_name(message: str) -> str:
+    """Detector-style name from the first sentence of a compiler message"""
+    words = re.findall(r"[a-z0-9]+", message.split(".")[0].lower())
+    return "solc-" + "-".join(words[:6])
+
+
+def run_solc_warnings(contract_file_path: str, solc_binary: str = "solc", timeout: float = 60) -> Dict[str, Any]:
+    """Compile with solc --standard-json and report its warnings as findings
+
+    A missing compiler is reported as skipped rather than an error, and
+    compilation errors (e.g. an unsupported pragma) are only counted since
+    they say nothing about the contract's security.
+    """
+    if shutil.which(solc_binary) is None:
+        return {"success": True, "skipped": f"{solc_binary} not found", "results": {"detectors": []}}
+
+    with open(contract_file_path) as source:
+        code = source.read()
+    file_name = os.path.basename(contract_file_path)
+    compiler_input = {
+        "language": "Solidity",
+        "sources": {file_name: {"content": code}},
+        # Only diagnostics are needed, skip code generation
+        "settings": {"outputSelection": {"*": {"": [], "*": []}}}
+    }
+    compiler_input = json.dumps(compiler_input)
+    with span("subprocess", os.path.basename(solc_binary), input_bytes=len(compiler_input)) as process_span:
+        result = subprocess.run(
+            [solc_binary, "--standard-json"], input=compiler_input,
+            capture_output=True, text=True, timeout=timeout
+        )
+        process_span.set(returncode=result.returncode, stdout_bytes=len(result.stdout))
+    if result.returncode != 0 and not result.stdout.strip():
+        return {"error": f"solc failed: {result.stderr.strip()[-2000:]}"}
+
+    output = json.loads(result.stdout)
+    # solc reports byte offsets
+    encoded = code.encode()
+    findings = []
+    compile_errors = 0
+    for diagnostic in output.get("errors", []):
+        if diagnostic.get("severity") == "error":
+            compile_errors += 1
+            continue
+        location = diagnostic.get("sourceLocation") or {}
+        line = encoded.count(b"\n", 0, location["start"]) + 1 if location.get("start", -1) >= 0 else None
+        code_id = diagnostic.get("errorCode", "")
+        message = diagnostic.get("message", "")
+        findings.append(make_finding(
+            "solc", solc_check_name(message),
+            "Low" if diagnostic.get("severity") == "warning" else "Informational",
+            f"{message} ({file_name}#{line})" if line else message, file_name, line, "High",
+            SOLC_ROOT_CAUSES.get(code_id)
+        ))
+    if compile_errors:
+        logger.info(f"solc reported {compile_errors} compilation errors for {contract_file_path}")
+    return {"success": True, "compile_errors": compile_errors, "results": {"detectors": findings}}
@@ -0,0 +1,272 @@
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, List
+
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """Raised by a provider when a completion request fails"""
+
+
+class NoProviderAvailable(Exception):
+    """Raised when every provider is unavailable or failed"""
+
+
+class LLMProvider:
+    """Base class for chat completion providers
+
+    Subclasses implement complete(). Fake providers used in tests only need
+    a name, a models mapping and a complete() method.
+    """
+
+    def __init__(self, name: str, models: Dict[str, str]):
+        self.name = name
+        self.models = models
+
+    def model_for(self, mode: str) -> str:
+        return self.models.get(mode) or self.models.get("chat")
+
+    def complete(self, model: str, system_prompt: str, content: str, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Provider for any OpenAI-compatible chat completions endpoint"""
+
+    def __init__(self, name: str, api_key: str, base_url: str, models: Dict[str, str],
+                 temperature: float = 0.7, max_tokens: int = 2000):
+        super().__init__(name, models)
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def complete(self, model: str, system_prompt: str, content: str, timeout: float) -> str:
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                timeout=timeout
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            raise ProviderError(str(e))
+
+
+class ProviderStats:
+    """Moving latency/error statistics and circuit breaker state for one provider model"""
+
+    def __init__(self, alpha: float = 0.3, window: int = 50):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_success(self, latency: float):
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.samples.append(latency)
+        self.consecutive_failures = 0
+
+    def record_failure(self, latency: float):
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.consecutive_failures += 1
+        self.samples.append(latency)
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "p95": self.p95(),
+            "error_rate": round(self.error_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_open": self.open_until > 0
+        }
+
+
+class LLMRouter:
+    """Routes completion requests to the fastest healthy provider
+
+    Providers are ranked by their moving average latency, penalized by their
+    error rate. A provider's circuit opens after failure_threshold consecutive
+    failures and is retried (half-open) once cooldown seconds have passed.
+    With hedging enabled, a second request is sent to the next provider if the
+    first has not answered within its p95 latency, and the first answer wins.
+
+    Without hedging, providers are tried one after another on the caller's
+    thread. Hedged requests run on an executor of max_concurrency threads,
+    which should cover the number of AI calls the app makes at once.
+    """
+
+    def __init__(self, providers: List[LLMProvider], failure_threshold: int = 3, cooldown: float = 60,
+                 hedge: bool = False, hedge_delay: float = 10, clock=time.monotonic, max_concurrency: int = 32):
+        self.providers = providers
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.clock = clock
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(2, max_concurrency), thread_name_prefix="llm")
+
+    def _stats(self, provider: LLMProvider, model: str) -> ProviderStats:
+        key = (provider.name, model)
+        if key not in self.stats:
+            self.stats[key] = ProviderStats()
+        return self.stats[key]
+
+    def _available(self, provider: LLMProvider, model: str) -> bool:
+        stats = self._stats(provider, model)
+        # Half-open once the cooldown has elapsed: let the next request probe the provider
+        return stats.open_until <= self.clock()
+
+    def rank(self, mode: str) -> List[LLMProvider]:
+        """Healthy providers for a mode, fastest first; unmeasured providers keep configured order"""
+        with self.lock:
+            candidates = []
+            for index, provider in enumerate(self.providers):
+                model = provider.model_for(mode)
+                if not model or not self._available(provider, model):
+                    continue
+                stats = self._stats(provider, model)
+                if stats.latency is None:
+                    score = 0.0
+                else:
+                    score = stats.latency * (1 + 4 * stats.error_rate)
+                candidates.append((score, index, provider))
+        return [provider for _, _, provider in sorted(candidates, key=lambda c: (c[0], c[1]))]
+
+    def _call(self, provider: LLMProvider, mode: str, system_prompt: str, content: str, timeout: float) -> str:
+        model = provider.model_for(mode)
+        started = self.clock()
+        try:
+            with span("llm_attempt", f"{provider.name}/{model}") as attempt_span:
+                result = provider.complete(model, system_prompt, content, timeout)
+                attempt_span.set(output_chars=len(result or ""))
+        except Exception as e:
+            elapsed = self.clock() - started
+            with self.lock:
+                stats = self._stats(provider, model)
+                stats.record_failure(elapsed)
+                if stats.consecutive_failures >= self.failure_threshold:
+                    stats.open_until = self.clock() + self.cooldown
+                    logger.warning(f"Opening circuit for {provider.name}/{model} for {self.cooldown}s")
+            logger.error(f"{provider.name} API Error: {str(e)}")
+            raise
+        elapsed = self.clock() - started
+        with self.lock:
+            stats = self._stats(provider, model)
+            stats.record_success(elapsed)
+            stats.open_until = 0.0
+        logger.info(f"{provider.name}/{model} answered in {elapsed:.2f}s")
+        return result
+
+    def _hedge_delay(self, provider: LLMProvider, mode: str) -> float:
+        with self.lock:
+            p95 = self._stats(provider, provider.model_for(mode)).p95()
+        return p95 if p95 is not None else self.hedge_delay
+
+    def complete(self, system_prompt: str, content: str, mode: str = "chat", timeout: float = 30) -> str:
+        """Return the first successful completion, trying providers in ranked order"""
+        with span("llm", mode, input_chars=len(system_prompt) + len(content)) as request_span:
+            result = self._complete(system_prompt, content, mode, timeout)
+            request_span.set(output_chars=len(result or ""))
+        return result
+
+    def _complete(self, system_prompt: str, content: str, mode: str, timeout: float) -> str:
+        ranked = self.rank(mode)
+        if not ranked:
+            raise NoProviderAvailable("No healthy AI provider available")
+        if not self.hedge or len(ranked) == 1:
+            return self._complete_in_order(ranked, system_prompt, content, mode, timeout)
+        return self._complete_hedged(ranked, system_prompt, content, mode, timeout)
+
+    def _complete_in_order(self, ranked: List[LLMProvider], system_prompt: str, content: str,
+                           mode: str, timeout: float) -> str:
+        errors = []
+        for provider in ranked:
+            try:
+                return self._call(provider, mode, system_prompt, content, timeout)
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e)}")
+        raise NoProviderAvailable("; ".join(errors) or "All AI providers failed")
+
+    def _complete_hedged(self, ranked: List[LLMProvider], system_prompt: str, content: str,
+                         mode: str, timeout: float) -> str:
+        pending = {}
+        queue = list(ranked)
+        errors = []
+
+        def launch():
+            provider = queue.pop(0)
+            # Set once a worker picks the call up, so time spent queued never triggers a hedge
+            started = {"event": threading.Event(), "at": None}
+
+            def attempt():
+                started["at"] = self.clock()
+                started["event"].set()
+                return self._call(provider, mode, system_prompt, content, timeout)
+
+            # Carry the caller's context (and its job profile) into the executor thread
+            future = self.executor.submit(contextvars.copy_context().run, attempt)
+            pending[future] = (provider, started)
+
+        launch()
+        while pending:
+            wait_for = None
+            if queue and len(pending) == 1:
+                future, (provider, started) = next(iter(pending.items()))
+                # Wait for the primary to leave the executor queue before starting its hedge timer
+                while not started["event"].wait(0.05):
+                    if future.done():
+                        break
+                if started["at"] is not None:
+                    wait_for = max(0.0, self._hedge_delay(provider, mode) - (self.clock() - started["at"]))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slower than its p95, hedge with the next provider
+                logger.info(f"Hedging AI request to {queue[0].name}")
+                launch()
+                continue
+
+            for future in done:
+                provider, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {str(e)}")
+                    continue
+                for other in pending:
+                    other.cancel()
+                return result
+
+            if not pending and queue:
+                launch()
+
+        raise NoProviderAvailable("; ".join(errors) or "All AI providers failed")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current per provider/model statistics"""
+        with self.lock:
+            return {f"{name}/{model}": stats.snapshot() for (name, model), stats in self.stats.items()}
@@ -0,0 +1,322 @@
+"""Concurrency load test for the verification API
+
+Drives a mix of submissions, polls and confirmations against the FastAPI app
+served by uvicorn inside this process, with Supabase, the AI providers and
+the analyzers replaced by local fakes that take a configurable time. Because
+the server shares this process's event loop, loop lag samples show directly
+when a request path blocks the loop.
+
+Usage:
+    python loadtest.py --users 50 --duration 30 --ai-latency 2 --slither-latency 1.5
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+from typing import Optional, Dict, Any, List
+
+import httpx
+
+CONTRACT = """pragma solidity ^0.8.20;
+
+contract Token {
+    mapping(address => uint256) public balances;
+
+    function transfer(address to, uint256 amount) public {
+        require(balances[msg.sender] >= amount);
+        balances[msg.sender] -= amount;
+        balances[to] += amount;
+    }
+}
+"""
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize_samples(samples: List[float]) -> Dict[str, Any]:
+    """Count and p50/p95/p99/max in milliseconds"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2) if samples else None,
+        "p95_ms": round(percentile(samples, 95) * 1000, 2) if samples else None,
+        "p99_ms": round(percentile(samples, 99) * 1000, 2) if samples else None,
+        "max_ms": round(max(samples) * 1000, 2) if samples else None
+    }
+
+
+def install_fakes(main, args):
+    """Swap external dependencies of the app for local fakes with the configured latencies"""
+    import analysis
+    from repository import InMemoryRepository
+
+    class SlowRepository(InMemoryRepository):
+        async def get_project(self, project_id):
+            await asyncio.sleep(args.db_latency)
+            return await super().get_project(project_id)
+
+        async def get_verification(self, verification_id, columns="*"):
+            await asyncio.sleep(args.db_latency)
+            return await super().get_verification(verification_id, columns)
+
+        async def create_verification(self, data):
+            await asyncio.sleep(args.db_latency)
+            return await super().create_verification(data)
+
+        async def update_verification(self, verification_id, data):
+            await asyncio.sleep(args.db_latency)
+            return await super().update_verification(verification_id, data)
+
+    def fake_slither(contract_file_path, profile="exhaustive"):
+        time.sleep(args.slither_latency)
+        return {"success": True, "error": None, "profile": profile, "duration": args.slither_latency,
+                "results": {"detectors": []}}
+
+    def fake_solc(contract_file_path, solc_binary="solc", timeout=60):
+        time.sleep(args.solc_latency)
+        return {"success": True, "compile_errors": 0, "results": {"detectors": []}}
+
+    def fake_ai(content, prompt, mode="chat", timeout=None):
+        time.sleep(args.ai_latency)
+        if "Slither" in prompt:
+            return json.dumps({"results": [], "logs": ["Verification started", "Verification completed"]})
+        # The spec prompt mentions CVL too, only the translation prompt asks for it
+        if "translate them" in prompt:
+            return "rule noop() { assert true; }"
+        return "1. Balances never go negative.\n2. Transfers preserve total supply."
+
+    def fake_certora(contract_file_path, cvl_code, certora_root="."):
+        time.sleep(args.certora_latency)
+        return {"rules": {"noop": "SUCCESS"}}
+
+    def fake_typecheck(contract_file_path, cvl_code, certora_root="."):
+        time.sleep(args.typecheck_latency)
+        return True
+
+    main.repository = SlowRepository()
+    # The analyzers call Slither and solc through the analysis module; the
+    # lint analyzer is pure Python and runs for real
+    analysis.run_slither_analysis = fake_slither
+    analysis.run_solc_warnings = fake_solc
+    main.process_results_with_ai = fake_ai
+    # Neither may reach CertoraRunner, which would set up a prover virtualenv
+    main.run_certoraprover = fake_certora
+    main.typecheck_cvl = fake_typecheck
+    return main.repository
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, project_ids: List[str], mix: Dict[str, float]):
+        self.client = client
+        self.project_ids = project_ids
+        self.mix = mix
+        self.latencies = {}
+        self.errors = {}
+        self.verification_ids = []
+        self.awaiting = []
+
+    def record(self, label: str, elapsed: float, ok: bool):
+        self.latencies.setdefault(label, []).append(elapsed)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    async def timed(self, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.record(label, time.perf_counter() - started, False)
+            return None
+        self.record(label, time.perf_counter() - started, response.status_code < 400)
+        return response
+
+    async def submit(self, level: str):
+        response = await self.timed(f"POST /verify/{level}", "POST", f"/verify/{level}",
+                                    json={"project_id": random.choice(self.project_ids)})
+        if response is not None and response.status_code == 200:
+            verification_id = response.json()["verification_id"]
+            self.verification_ids.append(verification_id)
+            if level == "deep":
+                self.awaiting.append(verification_id)
+
+    async def poll(self):
+        if not self.verification_ids:
+            return await self.timed("GET /ping", "GET", "/ping")
+        verification_id = random.choice(self.verification_ids)
+        await self.timed("GET /verification/{id}", "GET", f"/verification/{verification_id}",
+                         params={"fields": "status"})
+
+    async def confirm(self):
+        # Confirm the oldest deep verification whose draft is ready
+        for verification_id in self.awaiting[:5]:
+            response = await self.timed("GET /verification/{id}", "GET", f"/verification/{verification_id}",
+                                        params={"fields": "status,spec_draft"})
+            if response is None or response.status_code != 200:
+                continue
+            record = response.json()
+            # Another user may have confirmed it while this poll was in flight
+            if record.get("status") == "awaiting_confirmation" and verification_id in self.awaiting:
+                self.awaiting.remove(verification_id)
+                await self.timed("POST /verify/confirm/{id}", "POST", f"/verify/confirm/{verification_id}",
+                                 json={"specifications": record.get("spec_draft") or "1. Spec"})
+                return
+
+    async def step(self):
+        operation = random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if operation == "simple":
+            await self.submit("simple")
+        elif operation == "deep":
+            await self.submit("deep")
+        elif operation == "poll":
+            await self.poll()
+        elif operation == "confirm":
+            await self.confirm()
+        elif operation == "ping":
+            await self.timed("GET /ping", "GET", "/ping")
+        elif operation == "health":
+            await self.timed("GET /health", "GET", "/health")
+
+    async def user(self, deadline: float, think_time: float):
+        while time.monotonic() < deadline:
+            await self.step()
+            await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+
+async def sample_loop_lag(stop: asyncio.Event, interval: float, samples: List[float]):
+    """Measure how late the event loop wakes up compared to the requested sleep"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"simple", "deep", "poll", "confirm", "ping", "health"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def run(args) -> Dict[str, Any]:
+    server = None
+    server_task = None
+    project_ids = args.project_id or []
+
+    if args.url:
+        base_url = args.url
+    else:
+        import uvicorn
+        import main
+        # The app configures INFO logging on import, keep the report readable
+        logging.getLogger().setLevel(logging.WARNING)
+        repository = install_fakes(main, args)
+        project_ids = [repository.add_project(CONTRACT, name=f"Load test {i}")["id"] for i in range(args.projects)]
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=args.port, log_level="warning")
+        server = uvicorn.Server(config)
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+
+    if not project_ids:
+        raise SystemExit("--project-id is required when targeting an external --url")
+
+    # Against an external server the loop sampled here is only the client's own
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = None if args.url else asyncio.create_task(sample_loop_lag(stop, args.lag_interval, lag_samples))
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        test = LoadTest(client, project_ids, args.mix)
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(test.user(deadline, args.think_time) for _ in range(args.users)))
+        elapsed = time.monotonic() - started
+
+    stop.set()
+    if lag_task is not None:
+        await lag_task
+    if server is not None:
+        server.should_exit = True
+        await server_task
+
+    total = sum(len(samples) for samples in test.latencies.values())
+    return {
+        "target": base_url,
+        "users": args.users,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "verifications_submitted": len(test.verification_ids),
+        "endpoints": {
+            label: {**summarize_samples(samples), "errors": test.errors.get(label, 0)}
+            for label, samples in sorted(test.latencies.items())
+        },
+        "event_loop_lag": summarize_samples(lag_samples) if lag_task is not None else None
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Target {report['target']}: {report['users']} users for {report['duration_s']}s, "
+          f"{report['requests']} requests ({report['throughput_rps']} req/s)")
+    print(f"{'endpoint':<30}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, stats in report["endpoints"].items():
+        print(f"{label:<30}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    lag = report["event_loop_lag"]
+    if lag is None:
+        return
+    print(f"{'event loop lag':<30}{lag['count']:>8}{'':>8}{lag['p50_ms']!s:>10}{lag['p95_ms']!s:>10}{lag['p99_ms']!s:>10}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the verification API with mixed traffic")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--think-time", type=float, default=0.2, help="Mean pause between a user's requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("simple=1,deep=1,poll=6,confirm=1,ping=1,health=1"),
+                        help="Weighted operations, e.g. simple=1,deep=1,poll=6,confirm=1,ping=1,health=1")
+    parser.add_argument("--db-latency", type=float, default=0.05, help="Fake Supabase latency per call (s)")
+    parser.add_argument("--ai-latency", type=float, default=2.0, help="Fake AI latency per call (s)")
+    parser.add_argument("--slither-latency", type=float, default=1.0, help="Fake Slither latency per run (s)")
+    parser.add_argument("--solc-latency", type=float, default=0.3, help="Fake solc latency per run (s)")
+    parser.add_argument("--certora-latency", type=float, default=3.0, help="Fake Certora latency per run (s)")
+    parser.add_argument("--typecheck-latency", type=float, default=0.5, help="Fake CVL type check latency per run (s)")
+    parser.add_argument("--projects", type=int, default=5, help="Number of fake projects to create")
+    parser.add_argument("--port", type=int, default=0, help="Port for the in-process server (0 picks a free one)")
+    parser.add_argument("--url", default=None, help="Target an already running server instead (no fakes, event loop lag is not measured)")
+    parser.add_argument("--project-id", action="append", help="Existing project ID to use with --url")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="Event loop lag sampling interval (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per request timeout (s)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        # Must be set before the app module is imported
+        os.environ["DATA_BACKEND"] = "memory"
+        os.environ["SLITHER_POOL_SIZE"] = "0"
+        os.environ["FINDING_INDEX_PATH"] = ""
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,12 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Body, Query
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse
 import os
+import re
 import tempfile
-import uuid
 import json
 import subprocess
-import httpx
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-import supabase
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
@@ -16,6 +14,21 @@ import asyncio
 import logging
 import venv
 import sys
+from collections import OrderedDict
+from compression import CompressionMiddleware
+from certora_parser import parse_certora_results
+from llm_router import LLMRouter, OpenAICompatibleProvider, NoProviderAvailable
+from spec_chunker import build_chunks, estimate_tokens, merge_spec_fragments
+from repository import SupabaseRepository, InMemoryRepository, RepositoryError
+from finding_index import FindingIndex, function_fingerprints, function_for_line, finding_first_line, findings_kind, fingerprint, normalize_function
+from analyzer_output import run_to_spool, extract_certora_results
+from profiling import JobProfile, span, should_profile, profile_path, folded_stacks
+from cvl_blocks import SPEC_MARKER_INSTRUCTION, split_cvl_by_spec, plan_spec_edit, assemble_cvl, merge_edited_cvl
+from analysis import (
+    ANALYZER_OUTPUT_MAX_MB, SIMPLE_ANALYZERS, run_analyzer_async, merge_findings, get_slither_detectors,
+    slither_findings_to_issues, slither_finding_key,
+    shutdown_slither_pool as shutdown_analysis_pool
+)
 
 
 # Setup logging
@@ -30,13 +43,32 @@ load_dotenv()
 # Initialize Supabase client
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+# "supabase" (default) or "memory" to run without a database
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "supabase")
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_CONCURRENCY = int(os.environ.get("SUPABASE_MAX_CONCURRENCY", "20"))
 DEEPSEEK_REASONER_URL = os.environ.get("DEEPSEEK_REASONER_URL")
 DEEPSEEK_CHAT_URL = os.environ.get("DEEPSEEK_CHAT_URL")
 DEEPSEEK_API_KEY = os.environ.get("DEEPSEEK_API_KEY")
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+# Let the chat model reword the deterministic Certora issue titles and descriptions
+CERTORA_AI_PHRASING = os.environ.get("CERTORA_AI_PHRASING", "false").lower() == "true"
+# Contracts above this many (estimated) tokens get their specs generated per chunk
+SPEC_CHUNK_TOKENS = int(os.environ.get("SPEC_CHUNK_TOKENS", "6000"))
+SPEC_CHUNK_CONCURRENCY = int(os.environ.get("SPEC_CHUNK_CONCURRENCY", "4"))
+# SQLite file for the cross-project finding index, empty to disable reuse
+FINDING_INDEX_PATH = os.environ.get("FINDING_INDEX_PATH", os.path.join(tempfile.gettempdir(), "finding_index.sqlite3"))
+# Generate and type-check CVL from the draft while the user reviews it
+SPECULATIVE_CVL = os.environ.get("SPECULATIVE_CVL", "true").lower() == "true"
+SPECULATIVE_CVL_MAX_PENDING = int(os.environ.get("SPECULATIVE_CVL_MAX_PENDING", "100"))
+# Share of background jobs profiled without being asked to, and where profiles are kept
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "verification_profiles"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "10"))
 
 # Validate essential environment variables
-if not all([SUPABASE_URL, SUPABASE_KEY]):
+if DATA_BACKEND != "memory" and not all([SUPABASE_URL, SUPABASE_KEY]):
     logger.error("Missing essential environment variables")
     raise EnvironmentError("Missing essential environment variables. Check SUPABASE_URL and SUPABASE_KEY")
 
@@ -44,11 +76,23 @@ if not all([SUPABASE_URL, SUPABASE_KEY]):
 if not DEEPSEEK_API_KEY and not OPENROUTER_API_KEY:
     logger.warning("No AI API keys found. AI features will be disabled.")
 
-supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+if DATA_BACKEND == "memory":
+    repository = InMemoryRepository()
+else:
+    repository = SupabaseRepository(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        max_concurrency=SUPABASE_MAX_CONCURRENCY
+    )
 
 # Pydantic models for request/response validation
 class VerificationRequest(BaseModel):
     project_id: str
+    # Publish quick Slither findings first, then append the deeper scan results
+    progressive: bool = False
+    # Record a profile of the background job, downloadable from /verification/{id}/profile
+    profile: bool = False
 
 class AIRequest(BaseModel):
     content: str
@@ -59,40 +103,67 @@ class VerificationResponse(BaseModel):
     status: str
     message: str
 
+# Columns of verification_results that can be requested through ?fields=
+VERIFICATION_FIELDS = {
+    "id", "project_id", "level", "status", "results", "logs", "created_at",
+    "completed_at", "spec_draft", "spec_used", "cvl_code", "structured_results",
+    "logic_text"
+}
+
+def parse_fields(fields: Optional[str]) -> str:
+    """Turn a comma separated ?fields= value into a Supabase select clause"""
+    if not fields:
+        return "*"
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in VERIFICATION_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields requested: {', '.join(unknown)}")
+    if not requested:
+        return "*"
+    # Always include the id so clients can correlate responses
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return ",".join(dict.fromkeys(requested))
+
 # Helper functions
-def get_smart_contract(project_id: str) -> Dict[str, Any]:
+async def get_smart_contract(project_id: str) -> Dict[str, Any]:
     """Fetch smart contract from Supabase database"""
     logger.info(f"Fetching smart contract with project_id: {project_id}")
     try:
-        response = supabase_client.table("projects").select("*").eq("id", project_id).execute()
+        project = await repository.get_project(project_id)
         
-        if not response.data or len(response.data) == 0:
+        if not project:
             logger.error(f"Project with ID {project_id} not found")
             raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
         
         logger.info(f"Successfully retrieved project {project_id}")
-        return response.data[0]
+        return project
+    except HTTPException:
+        raise
+    except RepositoryError as e:
+        logger.error(f"Database error fetching smart contract: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable, please retry")
     except Exception as e:
         logger.error(f"Error fetching smart contract: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching smart contract: {str(e)}")
 
-def create_verification_record(project_id: str, level: str) -> str:
+async def create_verification_record(project_id: str, level: str) -> str:
     """Create a verification record in the database and return its ID"""
     logger.info(f"Creating verification record for project {project_id} with level {level}")
     try:
         # Insert the record
-        result = supabase_client.table("verification_results").insert({
+        record = await repository.create_verification({
             "project_id": project_id,
             "level": level,
             "status": "running",
             "results": [],
             "logs": ["Verification started"],
             "created_at": datetime.now().isoformat()
-        }).execute()
+        })
         
         # Extract the ID of the newly created record
-        if result and result.data and len(result.data) > 0:
-            verification_id = result.data[0]["id"]
+        if record and record.get("id"):
+            verification_id = record["id"]
             logger.info(f"Created verification record with ID: {verification_id}")
             return verification_id
         else:
@@ -104,7 +175,7 @@ def create_verification_record(project_id: str, level: str) -> str:
         raise HTTPException(status_code=500, detail=f"Error creating verification record: {str(e)}")
 
 
-def update_verification_status(verification_id: str, status: str, results: Dict[str, Any] = None, spec_draft: str = None, spec_used: str = None):
+async def update_verification_status(verification_id: str, status: str, results: Dict[str, Any] = None, spec_draft: str = None, spec_used: str = None):
     """Update the verification record with results"""
     logger.info(f"Updating verification record {verification_id} with status {status}")
     
@@ -146,94 +217,260 @@ def update_verification_status(verification_id: str, status: str, results: Dict[
         logger.info(f"Setting spec_used for verification {verification_id}")
     
     try:
-        response = supabase_client.table("verification_results").update(update_data).eq("id", verification_id).execute()
+        record = await repository.update_verification(verification_id, update_data)
         
         # Check if update was successful
-        if response.data:
+        if record:
             logger.info(f"Successfully updated verification record {verification_id}")
         else:
             logger.error(f"No data returned from update operation for verification {verification_id}")
             
     except Exception as e:
         logger.error(f"Error updating verification record {verification_id}: {str(e)}")
-        raise Exception(f"Database update failed: {str(e)}")
+        raise RepositoryError(f"Database update failed: {str(e)}")
 
-def run_slither_analysis(contract_file_path: str) -> Dict[str, Any]:
-    """Run Slither analysis on the smart contract"""
-    logger.info(f"Running Slither analysis on {contract_file_path}")
-    try:
-        result = subprocess.run(
-            ["slither", contract_file_path, "--json", "-"],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        if result.returncode != 0 and not result.stdout:
-            logger.error(f"Slither analysis failed: {result.stderr}")
-            return {"error": result.stderr}
-        
-        logger.info("Slither analysis completed successfully")
-        return json.loads(result.stdout)
-    except Exception as e:
-        logger.error(f"Error running Slither: {str(e)}")
-        return {"error": f"Error running Slither: {str(e)}"}
+finding_index = FindingIndex(FINDING_INDEX_PATH) if FINDING_INDEX_PATH else None
+# Simple verification's analyzers; progressive runs cover the exhaustive profile in two passes
+SIMPLE_FINDINGS_KIND = findings_kind(SIMPLE_ANALYZERS, "exhaustive")
 
-# AI processing function
-from openai import OpenAI
+def take_known_slither_findings(slither_results: Dict[str, Any], functions: List[Dict[str, Any]],
+                                known: Dict[str, List[Dict[str, Any]]]) -> tuple:
+    """Split off the findings already indexed for the function they are in
 
-def process_results_with_ai(content: str, prompt: str, mode: str = "chat", timeout=30):
-    """Process results using AI with fallback options"""
-    
-    # Try OpenRouter first if available
+    Returns the report without those findings and the indexed issues that
+    stand in for them, carrying the fresh finding's description. Findings the
+    index does not hold stay in the report.
+    """
+    detectors = get_slither_detectors(slither_results)
+    if not detectors or not known:
+        return slither_results, []
+    remaining = []
+    reused = []
+    for finding in detectors:
+        line = finding_first_line(finding)
+        function = function_for_line(functions, line)
+        cached = next((issue for issue in known.get(function["fingerprint"] if function else None, [])
+                       if issue.get("check") == finding.get("check") and issue.get("line", [])[:1] == [line]), None)
+        if cached is None:
+            remaining.append(finding)
+        elif not any(issue["check"] == cached["check"] and issue["line"] == cached["line"] for issue in reused):
+            # The index holds neutral text, this project's own finding describes it better
+            reused.append({**cached, "description": (finding.get("description") or "").strip() or cached["description"]})
+    return {**slither_results, "results": {**slither_results["results"], "detectors": remaining}}, reused
+
+def merge_known_findings(issues: List[Dict[str, Any]], reused: List[Dict[str, Any]], file_name: str) -> List[Dict[str, Any]]:
+    """Append indexed findings to freshly computed issues and renumber them"""
+    merged = list(issues) + [{**{k: v for k, v in issue.items() if k != "check"}, "file": file_name} for issue in reused]
+    return [{**issue, "id": f"issue-{index}"} for index, issue in enumerate(merged, start=1)]
+
+async def run_progressive_slither_analysis(contract_file_path: str, verification_id: str, publish) -> Dict[str, Any]:
+    """Run the quick Slither profile, publish its findings, then add the deeper scan
+
+    Returns a merged Slither report containing the findings of both passes
+    along with per-profile timings.
+    """
+    quick_results = await run_analyzer_async("slither", contract_file_path, "quick")
+    detectors = list(get_slither_detectors(quick_results))
+    await publish("slither", {"results": {"detectors": list(detectors)}},
+                  f"Quick scan found {len(detectors)} issues in {quick_results.get('duration')}s")
+
+    deep_results = await run_analyzer_async("slither", contract_file_path, "deep")
+    seen = {slither_finding_key(finding) for finding in detectors}
+    additional = []
+    for finding in get_slither_detectors(deep_results):
+        key = slither_finding_key(finding)
+        if key not in seen:
+            seen.add(key)
+            additional.append(finding)
+    detectors.extend(additional)
+
+    timings = {"quick": quick_results.get("duration"), "deep": deep_results.get("duration")}
+    logger.info(f"Progressive Slither timings for verification {verification_id}: {timings}")
+
+    errors = [r["error"] for r in (quick_results, deep_results) if r.get("error")]
+    merged = {
+        "success": not errors,
+        "results": {"detectors": detectors},
+        "profile": "progressive",
+        "timings": timings,
+        "duration": round(sum(t or 0 for t in timings.values()), 3)
+    }
+    if errors and not detectors:
+        merged["error"] = "; ".join(errors)
+    await publish("slither", merged, f"Full scan found {len(additional)} additional issues in {deep_results.get('duration')}s")
+    return merged
+
+async def run_analyzers(contract_file_path: str, verification_id: str, progressive: bool = False) -> Dict[str, Any]:
+    """Run the SIMPLE_ANALYZERS concurrently, publishing the merged findings as each one finishes
+
+    Returns one report in the Slither shape with the deduplicated findings of
+    all analyzers. Failed analyzers are listed under "errors"; "error" is only
+    set when every analyzer failed.
+    """
+    logs = ["Verification started", "Preparing environment", "Analyzing contract"]
+    reports = {}
+    publish_lock = asyncio.Lock()
+
+    async def publish(name: str, report: Dict[str, Any], message: str):
+        # Serialized so record updates land in the order the analyzers finish
+        async with publish_lock:
+            reports[name] = report
+            logs.append(message)
+            await update_verification_status(verification_id, "running", {
+                "results": slither_findings_to_issues(merge_findings(list(reports.values()))),
+                "logs": list(logs)
+            })
+
+    async def run(name: str) -> Dict[str, Any]:
+        if name == "slither" and progressive:
+            return await run_progressive_slither_analysis(contract_file_path, verification_id, publish)
+        report = await run_analyzer_async(name, contract_file_path)
+        if report.get("error"):
+            message = f"{name} failed: {report['error']}"
+        elif report.get("skipped"):
+            message = f"{name} skipped: {report['skipped']}"
+        else:
+            message = f"{name} found {len(get_slither_detectors(report))} issues in {report['duration']}s"
+        await publish(name, report, message)
+        return report
+
+    finished = await asyncio.gather(*(run(name) for name in SIMPLE_ANALYZERS))
+    timings = {name: report.get("duration") for name, report in zip(SIMPLE_ANALYZERS, finished)}
+    logger.info(f"Analyzer timings for verification {verification_id}: {timings}")
+
+    errors = {name: report["error"] for name, report in zip(SIMPLE_ANALYZERS, finished) if report.get("error")}
+    combined = {
+        "success": not errors,
+        "results": {"detectors": merge_findings(finished)},
+        "analyzers": SIMPLE_ANALYZERS,
+        "timings": timings
+    }
+    if errors:
+        combined["errors"] = errors
+        if len(errors) == len(finished):
+            combined["error"] = "; ".join(f"{name}: {error}" for name, error in errors.items())
+    return combined
+
+# AI processing function
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY", "10"))
+LLM_FAILURE_THRESHOLD = int(os.environ.get("LLM_FAILURE_THRESHOLD", "3"))
+LLM_CIRCUIT_COOLDOWN = float(os.environ.get("LLM_CIRCUIT_COOLDOWN", "60"))
+# Per mode request timeouts in seconds; reasoning models routinely take minutes
+LLM_TIMEOUTS = {
+    "chat": float(os.environ.get("LLM_CHAT_TIMEOUT", "60")),
+    "reasoner": float(os.environ.get("LLM_REASONER_TIMEOUT", "600")),
+}
+# Threads for hedged requests, should cover the AI calls the app makes at once
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "32"))
+
+def build_llm_router() -> Optional[LLMRouter]:
+    """Create the provider router from the configured API keys"""
+    providers = []
     if OPENROUTER_API_KEY:
-        try:
-            client = OpenAI(
-                api_key=OPENROUTER_API_KEY,
-                base_url="https://openrouter.ai/api/v1"
-            )
-            
-            if mode == "reasoner":
-                model = "deepseek/deepseek-r1-0528:free"
-            else:
-                model = "meta-llama/llama-3.3-8b-instruct:free"
-            
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"OpenRouter API Error: {str(e)}")
-    
-    # Fallback to DeepSeek if available
+        providers.append(OpenAICompatibleProvider(
+            "OpenRouter",
+            api_key=OPENROUTER_API_KEY,
+            base_url="https://openrouter.ai/api/v1",
+            models={"chat": "meta-llama/llama-3.3-8b-instruct:free", "reasoner": "deepseek/deepseek-r1-0528:free"}
+        ))
     if DEEPSEEK_API_KEY:
-        try:
-            client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
-            model = "deepseek-chat" if mode == "chat" else "deepseek-reasoner"
-            
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"DeepSeek API Error: {str(e)}")
+        providers.append(OpenAICompatibleProvider(
+            "DeepSeek",
+            api_key=DEEPSEEK_API_KEY,
+            base_url="https://api.deepseek.com",
+            models={"chat": "deepseek-chat", "reasoner": "deepseek-reasoner"}
+        ))
+    if not providers:
+        return None
+    return LLMRouter(
+        providers,
+        failure_threshold=LLM_FAILURE_THRESHOLD,
+        cooldown=LLM_CIRCUIT_COOLDOWN,
+        hedge=LLM_HEDGE,
+        hedge_delay=LLM_HEDGE_DELAY,
+        max_concurrency=LLM_MAX_CONCURRENCY
+    )
+
+llm_router = build_llm_router()
+
+def process_results_with_ai(content: str, prompt: str, mode: str = "chat", timeout: Optional[float] = None):
+    """Process results using the fastest healthy AI provider
+
+    timeout defaults to the LLM_TIMEOUTS entry for the mode.
+    """
     
     # No AI available
-    return {"error": "No AI API keys configured"}
+    if llm_router is None:
+        return {"error": "No AI API keys configured"}
+    
+    try:
+        return llm_router.complete(prompt, content, mode, timeout or LLM_TIMEOUTS.get(mode, LLM_TIMEOUTS["chat"]))
+    except NoProviderAvailable as e:
+        logger.error(f"AI processing failed: {str(e)}")
+        return {"error": str(e)}
+
+def generated_key(prompt: str, kind: str, key_source: str) -> str:
+    return fingerprint(f"{kind}:{fingerprint(prompt)}:{key_source}")
+
+async def store_generated(prompt: str, kind: str, key_source: str, output: Any):
+    """Index generated output for identical input, see generate_with_index"""
+    if finding_index and isinstance(output, str) and output.strip():
+        await asyncio.to_thread(finding_index.put, generated_key(prompt, kind, key_source), kind, output)
+
+async def generate_with_index(content: str, prompt: str, kind: str, key_source: str,
+                              use_cache: bool = True, store: bool = True):
+    """Run a reasoner prompt, reusing the indexed output for identical input
+
+    key_source is the text the cached output depends on (source code for
+    specs, the approved specification for CVL); it is keyed together with the
+    prompt so different prompts never share entries. Pass store=False when
+    the output still has to be validated and use_cache=False to regenerate
+    output that was rejected.
+    """
+    if finding_index and use_cache:
+        cached = await asyncio.to_thread(finding_index.get, generated_key(prompt, kind, key_source), kind)
+        if cached is not None:
+            logger.info(f"Reusing indexed {kind} output")
+            return cached
+    
+    output = await asyncio.to_thread(process_results_with_ai, content, prompt, "reasoner")
+    if store:
+        await store_generated(prompt, kind, key_source, output)
+    return output
+
+def rephrase_issues_with_ai(issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Optionally improve issue titles and descriptions with the chat model
+
+    Only the wording is taken from the AI; ids, severities, lines and files are
+    kept from the deterministic parser. Any failure returns the issues unchanged.
+    """
+    ai_prompt = """You are a smart contract security writer. I will give you a JSON list of formal verification issues.
+        Rewrite each "title" (≤ 120 characters, Title Case) and "description" (2–4 short sentences explaining the risk and how to fix it) so they are clear for developers.
+        Return a JSON list with one object per issue containing only "id", "title" and "description". Do not add, remove or merge issues. No markdown."""
+    
+    response = process_results_with_ai(json.dumps(issues), ai_prompt, "chat")
+    if isinstance(response, dict):
+        logger.warning(f"Skipping AI phrasing of Certora issues: {response.get('error')}")
+        return issues
+    
+    try:
+        response_text = str(response).strip()
+        rewritten = json.loads(response_text[response_text.find('['):response_text.rfind(']') + 1])
+        wording = {item["id"]: item for item in rewritten if isinstance(item, dict) and "id" in item}
+    except Exception as e:
+        logger.warning(f"Failed to parse AI phrasing of Certora issues: {str(e)}")
+        return issues
+    
+    rephrased = []
+    for issue in issues:
+        item = wording.get(issue["id"], {})
+        rephrased.append({
+            **issue,
+            "title": item.get("title") or issue["title"],
+            "description": item.get("description") or issue["description"]
+        })
+    return rephrased
 
 class CertoraRunner:
     """A class to manage Certora Prover runs with a reusable virtual environment"""
@@ -257,10 +494,8 @@ class CertoraRunner:
         self.python_path = None
         self.initialized = False
         
-        # Create a persistent directory for the virtual environment
-        venv_parent = os.path.join(tempfile.gettempdir(), "certora_venv")
-        os.makedirs(venv_parent, exist_ok=True)
-        self.venv_dir = os.path.join(venv_parent, ".venv")
+        # Persistent location for the virtual environment, created by initialize()
+        self.venv_dir = os.path.join(tempfile.gettempdir(), "certora_venv", ".venv")
         
         # Set paths based on platform
         if sys.platform == "win32":
@@ -282,6 +517,7 @@ class CertoraRunner:
             # Check if virtual environment exists
             if not os.path.exists(self.venv_dir):
                 self.logger.info(f"Creating virtual environment at {self.venv_dir}")
+                os.makedirs(os.path.dirname(self.venv_dir), exist_ok=True)
                 venv.create(self.venv_dir, with_pip=True)
                 
                 # Get pip path based on platform
@@ -310,12 +546,13 @@ class CertoraRunner:
             self.logger.error(f"Error initializing virtual environment: {str(e)}")
             return False
     
-    def run_prover(self, contract_file_path: str, cvl_code: str) -> dict:
+    def run_prover(self, contract_file_path: str, cvl_code: str, extra_args: List[str] = None) -> dict:
         """Run Certora Prover on the smart contract with CVL specs
         
         Args:
             contract_file_path: Path to the smart contract file
             cvl_code: CVL specifications as string
+            extra_args: Additional certoraRun arguments (e.g. ["--typecheck_only"])
         
         Returns:
             Dictionary containing the results or error information
@@ -340,18 +577,18 @@ class CertoraRunner:
             
             # Run Certora Prover
             self.logger.info("Executing Certora Prover...")
-            result = subprocess.run(
+            # Stream stdout to a spool file so large reports never sit in memory as one string
+            result = run_to_spool(
                 [
                     self.python_path, 
                     os.path.join(self.certora_root, "scripts", "certoraRun.py"), 
                     contract_file_path, 
                     "--spec", 
                     cvl_path, 
-                    "--json"
+                    "--json",
+                    *(extra_args or [])
                 ],
-                capture_output=True,
-                text=True,
-                check=False,
+                max_bytes=ANALYZER_OUTPUT_MAX_MB * 1024 * 1024,
                 cwd=self.certora_root  # Run from the repository root
             )
             
@@ -360,13 +597,16 @@ class CertoraRunner:
                 os.unlink(cvl_path)
                 cvl_path = None
             
-            # Process the result
-            if result.returncode != 0:
-                self.logger.error(f"Certora Prover failed: {result.stderr}")
-                return {"success": False, "error": result.stderr}
-            
-            self.logger.info("Certora Prover completed successfully")
-            return json.loads(result.stdout) if result.stdout else {"success": True}
+            try:
+                # Process the result
+                if result.returncode != 0:
+                    self.logger.error(f"Certora Prover failed: {result.stderr_tail}")
+                    return {"success": False, "error": result.stderr_tail}
+                
+                self.logger.info("Certora Prover completed successfully")
+                return extract_certora_results(result.stdout) if result.stdout_size else {"success": True}
+            finally:
+                result.close()
             
         except Exception as e:
             # Clean up if exception occurs
@@ -406,8 +646,175 @@ def run_certoraprover(contract_file_path: str, cvl_code: str, certora_root: str
         logger.error(f"Error in run_certoraprover: {str(e)}")
         return {"success": False, "error": str(e)}
 
+# certoraRun errors that reject the CVL itself, and errors of the prover's own setup
+CVL_ERROR_PATTERN = re.compile(r"syntax|type ?check|\.spec\b|\bcvl\b|undefined|unknown (function|variable|type|method)", re.IGNORECASE)
+PROVER_SETUP_ERROR_PATTERN = re.compile(
+    r"\bjava\b|jdk|No such file or directory|ModuleNotFoundError|ImportError|Permission denied|"
+    r"certoraKey|virtual environment|Connection|Timed? ?out", re.IGNORECASE)
+
+def typecheck_cvl(contract_file_path: str, cvl_code: str, certora_root: str = ".") -> Optional[bool]:
+    """Type-check CVL against the contract without running the prover
+    
+    Returns True/False for the check outcome, or None if the check could not
+    run, including failures of the prover setup (e.g. no Java runtime) that
+    say nothing about the CVL.
+    """
+    global _certora_runner
+    
+    try:
+        if '_certora_runner' not in globals() or _certora_runner is None:
+            _certora_runner = CertoraRunner(certora_root)
+        # A missing prover checkout says nothing about the CVL itself
+        if not os.path.exists(os.path.join(_certora_runner.certora_root, "scripts", "certoraRun.py")):
+            return None
+        if not _certora_runner.initialized and not _certora_runner.initialize():
+            return None
+        result = _certora_runner.run_prover(contract_file_path, cvl_code, ["--typecheck_only"])
+        if not (isinstance(result, dict) and result.get("success") is False):
+            return True
+        error = str(result.get("error") or "")
+        if PROVER_SETUP_ERROR_PATTERN.search(error) or not CVL_ERROR_PATTERN.search(error):
+            logger.warning(f"CVL type check could not run: {error[-500:]}")
+            return None
+        return False
+    except Exception as e:
+        logger.error(f"Error in typecheck_cvl: {str(e)}")
+        return None
+
+CVL_PROMPT = """You are an expert in writing formal specifications in Certora Verification Language (CVL). I will send you a confirmed list of functional and security specifications written in English. Your task is to translate them into correct and complete CVL code.
+
+        Rules:
+        Make sure to cover all logic from the English spec.
+        Use invariant, rule, or function_spec as appropriate.
+        Clearly name your invariants and rules.
+        Follow Certora CVL best practices.""" + SPEC_MARKER_INSTRUCTION + """
+        """
+
+# Speculative CVL generation: verification ID -> (draft spec, task)
+speculative_cvl_tasks = OrderedDict()
+
+async def typecheck_project_cvl(project_id: str, cvl_code: str) -> Optional[bool]:
+    """Type-check CVL against the project's contract, see typecheck_cvl"""
+    project = await get_smart_contract(project_id)
+    with tempfile.NamedTemporaryFile(suffix=".sol", delete=False) as contract_file:
+        contract_file.write(project.get("code", "").encode())
+        contract_path = contract_file.name
+    try:
+        return await asyncio.to_thread(typecheck_cvl, contract_path, cvl_code)
+    finally:
+        os.unlink(contract_path)
+
+async def speculate_cvl(project_id: str, verification_id: str, spec_draft: str) -> Dict[str, Any]:
+    """Generate and type-check CVL from the draft while the user reviews it"""
+    logger.info(f"Speculatively generating CVL for verification {verification_id}")
+    key_source = " ".join(spec_draft.split())
+    cvl_code = await generate_with_index(spec_draft, CVL_PROMPT, "cvl", key_source, store=False)
+    if not isinstance(cvl_code, str):
+        raise RuntimeError(f"Speculative CVL generation failed: {cvl_code.get('error')}")
+    
+    typecheck = await typecheck_project_cvl(project_id, cvl_code)
+    # Only CVL that passed (or could not be checked) is indexed for reuse
+    if typecheck is not False:
+        await store_generated(CVL_PROMPT, "cvl", key_source, cvl_code)
+    logger.info(f"Speculative CVL ready for verification {verification_id} (typecheck: {typecheck})")
+    return {"spec": spec_draft, "cvl_code": cvl_code, "typecheck": typecheck}
+
+def log_speculation_failure(task: asyncio.Task):
+    """Retrieve the outcome of a speculative job so a failure nobody awaits is logged once"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"{task.get_name()} failed: {str(task.exception())}")
+
+def start_speculative_cvl(project_id: str, verification_id: str, spec_draft: str):
+    """Kick off speculative CVL generation, dropping the oldest pending jobs beyond the limit"""
+    task = asyncio.create_task(speculate_cvl(project_id, verification_id, spec_draft),
+                               name=f"Speculative CVL for verification {verification_id}")
+    task.add_done_callback(log_speculation_failure)
+    speculative_cvl_tasks[verification_id] = (spec_draft, task)
+    while len(speculative_cvl_tasks) > SPECULATIVE_CVL_MAX_PENDING:
+        _, (_, oldest) = speculative_cvl_tasks.popitem(last=False)
+        oldest.cancel()
+
+async def take_speculative_cvl(verification_id: str, approved_spec: str) -> Optional[Dict[str, Any]]:
+    """Return the usable speculative result for a confirmed spec, cancelling work that is no longer needed
+    
+    When the spec is unchanged we wait for the speculative job since it is
+    ahead of a fresh generation. When it changed, an already finished result
+    is still returned so unchanged items can be reused. The caller checks
+    its "typecheck" outcome.
+    """
+    spec_draft, task = speculative_cvl_tasks.pop(verification_id, (None, None))
+    if task is None:
+        return None
+    
+    try:
+        if task.done():
+            speculation = task.result()
+        elif approved_spec == spec_draft:
+            speculation = await task
+        else:
+            task.cancel()
+            return None
+    except (asyncio.CancelledError, Exception) as e:
+        logger.warning(f"Speculative CVL for verification {verification_id} unusable: {str(e)}")
+        return None
+    
+    return speculation
+
+async def resolve_cvl(project_id: str, verification_id: str, approved_spec: str):
+    """CVL for the approved spec, reusing speculative work where possible"""
+    speculation = await take_speculative_cvl(verification_id, approved_spec)
+    failed_typecheck = bool(speculation) and speculation.get("typecheck") is False
+    if failed_typecheck:
+        logger.info(f"Discarding speculative CVL for verification {verification_id}: type check failed")
+        speculation = None
+    if speculation and speculation["spec"] == approved_spec:
+        logger.info(f"Using precomputed CVL for verification {verification_id}")
+        return speculation["cvl_code"], "Using precomputed CVL code"
+    
+    if speculation:
+        preamble, blocks = split_cvl_by_spec(speculation["cvl_code"])
+        reused, edited = plan_spec_edit(speculation["spec"], approved_spec, blocks)
+        if blocks and reused:
+            cvl_code = assemble_cvl(preamble, reused)
+            if edited:
+                logger.info(f"Regenerating CVL for {len(edited)} edited specification items")
+                edited_spec = "\n".join(f"{number}. {item}" for number, item in edited)
+                edited_prompt = CVL_PROMPT + f"""
+        Only the listed items changed. The rest of the specification already has CVL that starts with these shared declarations, reuse them instead of redeclaring:
+        {preamble}"""
+                edited_cvl = await asyncio.to_thread(process_results_with_ai, edited_spec, edited_prompt, "reasoner")
+                cvl_code = merge_edited_cvl(preamble, reused, edited_cvl, edited) if isinstance(edited_cvl, str) else None
+            # Blocks from two generations may not fit together, only keep them if they type-check
+            if cvl_code and await typecheck_project_cvl(project_id, cvl_code) is False:
+                logger.info(f"Partially reused CVL for verification {verification_id} failed the type check")
+                cvl_code = None
+            if cvl_code:
+                return cvl_code, f"Reused precomputed CVL for {len(reused)} unchanged specification items"
+    
+    logger.info("Generating CVL code from approved specifications")
+    # The index may hold the CVL that just failed its type check for this spec
+    cvl_code = await generate_with_index(approved_spec, CVL_PROMPT, "cvl", " ".join(approved_spec.split()),
+                                         use_cache=not failed_typecheck)
+    return cvl_code, None
+
+async def run_profiled(job: str, verification_id: str, requested: bool, task, *args):
+    """Run a background task, capturing a JobProfile when requested or sampled"""
+    if not should_profile(requested, PROFILE_SAMPLE_RATE):
+        return await task(*args)
+    profile = JobProfile(job, verification_id, PROFILE_INTERVAL_MS / 1000)
+    profile.start()
+    try:
+        return await task(*args)
+    finally:
+        profile.stop()
+        try:
+            path = await asyncio.to_thread(profile.save, PROFILE_DIR)
+            logger.info(f"Profile of {job} for verification {verification_id} saved to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save profile for verification {verification_id}: {str(e)}")
+
 # Verification tasks
-async def run_simple_verification(project_id: str, verification_id: str):
+async def run_simple_verification(project_id: str, verification_id: str, progressive: bool = False):
     logger.info(f"Starting simple verification for project {project_id}")
     try:
         # Create project-specific temp directory
@@ -415,10 +822,10 @@ async def run_simple_verification(project_id: str, verification_id: str):
         os.makedirs(temp_dir, exist_ok=True)
         
         # Update logs to show verification started
-        update_verification_status(verification_id, "running", {"logs": ["Verification started", "Preparing environment"]})
+        await update_verification_status(verification_id, "running", {"logs": ["Verification started", "Preparing environment"]})
         
         # Get smart contract
-        project = get_smart_contract(project_id)
+        project = await get_smart_contract(project_id)
         contract_code = project.get("code", "")
         
         # Write contract to project temp directory
@@ -428,22 +835,37 @@ async def run_simple_verification(project_id: str, verification_id: str):
         
         logger.info(f"Contract saved to file: {contract_path}")
         
+        # Findings indexed for identical functions in earlier submissions
+        functions = function_fingerprints(contract_code)
+        known_findings = await asyncio.to_thread(finding_index.lookup_findings, functions, SIMPLE_FINDINGS_KIND) if finding_index else {}
+        if known_findings:
+            logger.info(f"Finding index matched {len(known_findings)} of {len(functions)} code sections")
+        
         # Update logs
-        update_verification_status(verification_id, "running", {"logs": ["Verification started", "Preparing environment", "Analyzing contract"]})
+        await update_verification_status(verification_id, "running", {"logs": ["Verification started", "Preparing environment", "Analyzing contract"]})
         
-        # Run Slither analysis
-        slither_results = run_slither_analysis(contract_path)
+        # Run Slither, solc and the linter side by side
+        with span("stage", "analyzers"):
+            slither_results = await run_analyzers(contract_path, verification_id, progressive)
         
-        # Save slither results for debugging
-        slither_output_path = os.path.join(temp_dir, "slither_results.json")
+        # Save analyzer results for debugging
+        slither_output_path = os.path.join(temp_dir, "analyzer_results.json")
         with open(slither_output_path, "w") as slither_file:
-            json.dump(slither_results, slither_file, indent=2)
+            json.dump(slither_results, slither_file)
+        
+        logger.info(f"Analyzer results saved to: {slither_output_path}")
+        
+        # Index the analyzers' own findings; a failed analyzer would leave findings out
+        if finding_index and not slither_results.get("errors"):
+            await asyncio.to_thread(finding_index.store_findings, functions, get_slither_detectors(slither_results), SIMPLE_FINDINGS_KIND)
         
-        logger.info(f"Slither results saved to: {slither_output_path}")
+        # Findings the index already holds are reused instead of sent to the AI
+        slither_results, reused_findings = take_known_slither_findings(slither_results, functions, known_findings)
         
         # Process results with AI
         logger.info("Processing Slither results with AI")
         ai_prompt = """You are a blockchain security analyst AI. I will give you the results from a Slither static analysis tool.
+        Some findings come from solc compiler warnings or a pattern linter instead (their "analyzers" field says which); treat them like Slither findings.
         Your task is to extract all relevant vulnerabilities and format them into a JSON structure that exactly matches this template for a Completed Simple Verification:
 
         {
@@ -507,8 +929,17 @@ Do NOT invent issues that do not appear in the Slither output.
 Output must be a single, valid JSON object in the exact shape below—no extra keys, no comments, no markdown.
         Replace all placeholders. Write realistic issue titles, descriptions "that are better and let the user informed well about issues and hints to fix without hard reading results or complex description or any id mentionned ot slashes(/), process it well", line numbers, and severity based on the actual Slither findings. Use standard naming conventions for issues (e.g., "Reentrancy vulnerability", "Unchecked return value", etc.). Do not include unrelated information. Your output should be a well-formed JSON object ready for insertion into Supabase."""
         
-        # Increase timeout for AI processing
-        processed_results = process_results_with_ai(json.dumps(slither_results), ai_prompt, "chat", timeout=60)
+        if not get_slither_detectors(slither_results):
+            # Nothing new to normalize (a clean contract or only reused findings), skip the AI round trip
+            logger.info("No findings left for the AI, skipping normalization")
+            processed_results = {
+                "results": [],
+                "logs": ["Verification started", "Preparing environment", "Analyzing contract",
+                         "Detecting vulnerabilities", "Verification completed"]
+            }
+        else:
+            with span("stage", "ai_normalization"):
+                processed_results = await asyncio.to_thread(process_results_with_ai, json.dumps(slither_results), ai_prompt, "chat")
         
         # Save AI response for debugging
         ai_response_path = os.path.join(temp_dir, "ai_response_raw.txt")
@@ -590,6 +1021,10 @@ Output must be a single, valid JSON object in the exact shape below—no extra k
                     error_file.write(f"Error: {str(parsing_error)}\n\n")
                     error_file.write(f"Original AI response: {response_text}")
         
+        if reused_findings:
+            final_results["results"] = merge_known_findings(final_results["results"], reused_findings, os.path.basename(contract_path))
+            final_results["logs"].insert(-1, f"Reused {len(reused_findings)} indexed findings")
+        
         # Save final processed results for debugging
         final_results_path = os.path.join(temp_dir, "final_results.json")
         with open(final_results_path, "w") as results_file:
@@ -599,7 +1034,7 @@ Output must be a single, valid JSON object in the exact shape below—no extra k
         
         # Update verification record
         logger.info("Updating verification record with final results")
-        update_verification_status(verification_id, "completed", final_results)
+        await update_verification_status(verification_id, "completed", final_results)
         
         # Add debug info to logs
         logger.info(f"Simple verification completed for project {project_id}. Debug files in {temp_dir}")
@@ -623,18 +1058,56 @@ Output must be a single, valid JSON object in the exact shape below—no extra k
             "logs": ["Verification started", "Error encountered", f"Error: {str(e)}", f"Debug info in {temp_dir}"],
             "error": str(e)
         }
-        update_verification_status(verification_id, "failed", error_data) 
+        await update_verification_status(verification_id, "failed", error_data) 
 
 
+async def generate_chunked_specifications(contract_code: str, ai_prompt: str, verification_id: str):
+    """Generate specifications per contract/function chunk concurrently and merge them
+
+    Returns the merged numbered specification list, or an error dict if every
+    chunk failed.
+    """
+    chunks = build_chunks(contract_code, SPEC_CHUNK_TOKENS)
+    logger.info(f"Generating specifications for {len(chunks)} chunks")
+    semaphore = asyncio.Semaphore(SPEC_CHUNK_CONCURRENCY)
+    logs = ["Deep verification initiated", "Generating formal specifications",
+            f"Contract split into {len(chunks)} parts"]
+    chunk_prompt = ai_prompt + """
+
+        You are given one part of a larger project. Only write specifications for the code in this part; other contracts and functions are covered separately."""
+
+    completed = 0
+
+    async def generate(chunk):
+        nonlocal completed
+        async with semaphore:
+            fragment = await generate_with_index(
+                chunk["code"], chunk_prompt, "spec", normalize_function(chunk["code"], rename_identifiers=False)
+            )
+        completed += 1
+        if isinstance(fragment, dict):
+            logs.append(f"Failed to generate specifications for {chunk['label']} ({completed}/{len(chunks)})")
+        else:
+            logs.append(f"Generated specifications for {chunk['label']} ({completed}/{len(chunks)})")
+        await update_verification_status(verification_id, "running", {"logs": list(logs)})
+        return fragment
+
+    fragments = await asyncio.gather(*(generate(chunk) for chunk in chunks))
+    succeeded = [fragment for fragment in fragments if isinstance(fragment, str)]
+    if not succeeded:
+        errors = [fragment.get("error", "") for fragment in fragments if isinstance(fragment, dict)]
+        return {"error": "; ".join(dict.fromkeys(errors)) or "Specification generation failed"}
+    return merge_spec_fragments(succeeded)
+
 async def run_deep_verification(project_id: str, verification_id: str):
     """Background task to run deep verification with AI specification generation"""
     logger.info(f"Starting deep verification for project {project_id}")
     try:
         # Update logs to show verification started
-        update_verification_status(verification_id, "running", {"logs": ["Deep verification initiated", "Generating formal specifications"]})
+        await update_verification_status(verification_id, "running", {"logs": ["Deep verification initiated", "Generating formal specifications"]})
         
         # Get smart contract
-        project = get_smart_contract(project_id)
+        project = await get_smart_contract(project_id)
         contract_code = project.get("code", "")
         
         # Write contract to temporary file
@@ -664,8 +1137,14 @@ async def run_deep_verification(project_id: str, verification_id: str):
         4. Function `withdraw` must update internal state before making external calls.
         Your output should deeply and precisely define how the contract should behave and what properties must always hold. Do not include unrelated information."""
         
-        logger.info("Generating specifications with AI")
-        spec_draft = process_results_with_ai(contract_code, ai_prompt, "reasoner")
+        with span("stage", "spec_generation", contract_chars=len(contract_code)):
+            if estimate_tokens(contract_code) > SPEC_CHUNK_TOKENS:
+                spec_draft = await generate_chunked_specifications(contract_code, ai_prompt, verification_id)
+            else:
+                logger.info("Generating specifications with AI")
+                spec_draft = await generate_with_index(
+                    contract_code, ai_prompt, "spec", normalize_function(contract_code, rename_identifiers=False)
+                )
         
         # Check if AI returned an error
         if isinstance(spec_draft, dict) and "error" in spec_draft:
@@ -675,7 +1154,7 @@ async def run_deep_verification(project_id: str, verification_id: str):
                 "logs": ["Deep verification initiated", "Error generating specifications", f"Error: {spec_draft['error']}"],
                 "error": spec_draft['error']
             }
-            update_verification_status(verification_id, "failed", error_data)
+            await update_verification_status(verification_id, "failed", error_data)
             return
             
         # Update record with draft specifications - FIX: Pass spec_draft correctly
@@ -692,7 +1171,9 @@ async def run_deep_verification(project_id: str, verification_id: str):
             spec_draft_str = spec_draft
             
         # FIX: This was the main issue - properly save spec_draft
-        update_verification_status(verification_id, "awaiting_confirmation", spec_update, spec_draft_str)
+        await update_verification_status(verification_id, "awaiting_confirmation", spec_update, spec_draft_str)
+        if SPECULATIVE_CVL and spec_draft_str:
+            start_speculative_cvl(project_id, verification_id, spec_draft_str)
         
         # Clean up
         os.unlink(contract_path)
@@ -706,19 +1187,19 @@ async def run_deep_verification(project_id: str, verification_id: str):
             "logs": ["Deep verification initiated", "Error encountered", f"Error: {str(e)}"],
             "error": str(e)
         }
-        update_verification_status(verification_id, "failed", error_data)
+        await update_verification_status(verification_id, "failed", error_data)
 
 async def finalize_deep_verification(project_id: str, verification_id: str, approved_spec: str):
     """Background task to complete deep verification after user confirmation"""
     logger.info(f"Finalizing deep verification for project {project_id}")
     try:
         # Update logs to show verification continuing
-        update_verification_status(verification_id, "processing", {
+        await update_verification_status(verification_id, "processing", {
             "logs": ["Deep verification initiated", "Specifications confirmed by user", "Running formal verification"]
         })
         
         # Get smart contract
-        project = get_smart_contract(project_id)
+        project = await get_smart_contract(project_id)
         contract_code = project.get("code", "")
         
         # Write contract to temporary file
@@ -728,18 +1209,13 @@ async def finalize_deep_verification(project_id: str, verification_id: str, appr
         
         logger.info(f"Contract saved to temporary file: {contract_path}")
         
-        # Generate CVL code from approved specifications
-        ai_prompt = """You are an expert in writing formal specifications in Certora Verification Language (CVL). I will send you a confirmed list of functional and security specifications written in English. Your task is to translate them into correct and complete CVL code.
-
-        Rules:
-        Make sure to cover all logic from the English spec.
-        Use invariant, rule, or function_spec as appropriate.
-        Clearly name your invariants and rules.
-        Follow Certora CVL best practices.
-        """
-        
-        logger.info("Generating CVL code from approved specifications")
-        cvl_response = process_results_with_ai(approved_spec, ai_prompt, "reasoner")
+        # Generate CVL code from approved specifications, reusing the speculative draft CVL where it still applies
+        with span("stage", "cvl_generation"):
+            cvl_response, reuse_log = await resolve_cvl(project_id, verification_id, approved_spec)
+        if reuse_log:
+            await update_verification_status(verification_id, "processing", {
+                "logs": ["Deep verification initiated", "Specifications confirmed by user", reuse_log, "Running formal verification"]
+            })
         
         # Check if AI returned an error
         if isinstance(cvl_response, dict) and "error" in cvl_response:
@@ -749,7 +1225,7 @@ async def finalize_deep_verification(project_id: str, verification_id: str, appr
                 "logs": ["Deep verification initiated", "Specifications confirmed by user", "Error generating CVL code", f"Error: {cvl_response['error']}"],
                 "error": cvl_response['error']
             }
-            update_verification_status(verification_id, "failed", error_data)
+            await update_verification_status(verification_id, "failed", error_data)
             return
             
         # Extract CVL code
@@ -758,74 +1234,27 @@ async def finalize_deep_verification(project_id: str, verification_id: str, appr
             cvl_code = cvl_response.get("content", "")
         
         try:
-            supabase_client.table("verification_results").update({"cvl_code": cvl_code}).eq("id", verification_id).execute()
+            await repository.update_verification(verification_id, {"cvl_code": cvl_code})
             logger.info(f"Stored CVL code for verification {verification_id}")
         except Exception as e:
            logger.error(f"Failed to store CVL code: {e}")
 
         # Run Certora Prover
         logger.info("Running Certora Prover with generated CVL code")
-        certora_results = run_certoraprover(contract_path, cvl_code)
+        with span("stage", "certora_prover"):
+            certora_results = await asyncio.to_thread(run_certoraprover, contract_path, cvl_code)
         
-        # Process Certora results with AI
-        ai_prompt = f"""You are a blockchain AI agent. I will give you the results from a Certora formal verification run. Your task is to reformat the results to match this JSON structure for a Completed Deep Verification:
-
-        {{
-        "results": [
-            {{
-            "id": "issue-1",
-            "type": "error | warning | info",
-            "title": "Summary of issue",
-            "description": "Detailed explanation of the issue",
-            "line": [approximate line in Contract.sol],
-            "file": "[filename.sol]",
-            "severity": "critical | high | medium | low"
-            }}
-        ],
-        "logs": [
-            "Deep verification initiated",
-            "Generating formal specifications",
-            "Specifications confirmed by user",
-            "Running formal verification",
-            "Analyzing contract properties",
-            "Found X issues",
-            "Verification completed"
-        ]
-        }}
-        Your output must follow the structure and tone exactly. For line numbers, approximate based on error trace. Severity must be logically assessed (e.g., invariant violations = critical, gas tips = low)."""
+        # Map prover verdicts to issues deterministically
+        logger.info("Parsing Certora results")
+        final_results = parse_certora_results(certora_results, cvl_code, f"contract_{project_id}.sol")
         
-        logger.info("Processing Certora results with AI")
-        processed_response = process_results_with_ai(json.dumps(certora_results), ai_prompt, "chat")
-        
-        # Parse AI response
-        try:
-            if isinstance(processed_response, dict) and "error" in processed_response:
-                final_results = processed_response
-            else:
-                # Try to parse the JSON string from AI
-                try:
-                    final_results = json.loads(processed_response)
-                except json.JSONDecodeError:
-                    final_results = {
-                        "results": [],
-                        "logs": ["Deep verification initiated", "Specifications confirmed by user", 
-                                "Running formal verification", "Error processing results", 
-                                "Verification completed with errors"],
-                        "error": "Failed to parse AI response"
-                    }
-        except Exception as parsing_error:
-            logger.error(f"Error parsing AI response: {str(parsing_error)}")
-            final_results = {
-                "results": [],
-                "logs": ["Deep verification initiated", "Specifications confirmed by user", 
-                        "Running formal verification", "Error processing results", 
-                        "Verification completed with errors"],
-                "error": str(parsing_error)
-            }
+        if CERTORA_AI_PHRASING and final_results["results"]:
+            final_results["results"] = await asyncio.to_thread(rephrase_issues_with_ai, final_results["results"])
         
         # Update verification record with final results
         logger.info("Updating verification record with final results")
-        update_verification_status(verification_id, "completed", final_results, None, approved_spec)
+        status = "failed" if "error" in final_results else "completed"
+        await update_verification_status(verification_id, status, final_results, None, approved_spec)
         
         # Clean up
         os.unlink(contract_path)
@@ -839,7 +1268,7 @@ async def finalize_deep_verification(project_id: str, verification_id: str, appr
             "logs": ["Deep verification initiated", "Specifications confirmed by user", "Error encountered", f"Error: {str(e)}"],
             "error": str(e)
         }
-        update_verification_status(verification_id, "failed", error_data)
+        await update_verification_status(verification_id, "failed", error_data)
 
 # API Endpoints
 
@@ -856,10 +1285,11 @@ async def verify_simple(request: VerificationRequest, background_tasks: Backgrou
     project_id = request.project_id
     
     # Create verification record
-    verification_id = create_verification_record(project_id, "simple")
+    verification_id = await create_verification_record(project_id, "simple")
     
     # Start background task
-    background_tasks.add_task(run_simple_verification, project_id, verification_id)
+    background_tasks.add_task(run_profiled, "simple_verification", verification_id, request.profile,
+                              run_simple_verification, project_id, verification_id, request.progressive)
     
     logger.info(f"Simple verification task started for project {project_id} with verification ID {verification_id}")
     return VerificationResponse(
@@ -875,10 +1305,11 @@ async def verify_deep(request: VerificationRequest, background_tasks: Background
     project_id = request.project_id
     
     # Create verification record
-    verification_id = create_verification_record(project_id, "deep")
+    verification_id = await create_verification_record(project_id, "deep")
     
     # Start background task
-    background_tasks.add_task(run_deep_verification, project_id, verification_id)
+    background_tasks.add_task(run_profiled, "deep_verification", verification_id, request.profile,
+                              run_deep_verification, project_id, verification_id)
     
     logger.info(f"Deep verification task started for project {project_id} with verification ID {verification_id}")
     return VerificationResponse(
@@ -891,21 +1322,22 @@ async def verify_deep(request: VerificationRequest, background_tasks: Background
 async def confirm_specifications(
     verification_id: str,
     background_tasks: BackgroundTasks,
-    specifications: Any = Body(...)):
+    specifications: Any = Body(...),
+    profile: bool = Query(False, description="Record a profile of the finalization job")):
 
     logger.info(f"Received confirmation for verification ID {verification_id}")
     logger.debug(f"Request body: {specifications}")
 
     # 1) Fetch existing record
-    resp = supabase_client.table("verification_results")\
-        .select("*")\
-        .eq("id", verification_id)\
-        .execute()
-    if not resp.data:
+    try:
+        verification = await repository.get_verification(verification_id)
+    except RepositoryError as e:
+        logger.error(f"Database error fetching verification {verification_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable, please retry")
+    if not verification:
         logger.error(f"Verification record with ID {verification_id} not found")
         raise HTTPException(status_code=404, detail="Verification record not found")
 
-    verification = resp.data[0]
     spec_draft = verification.get("spec_draft", "")
 
     # 2) Reset to awaiting_confirmation if needed
@@ -914,7 +1346,10 @@ async def confirm_specifications(
             f"Resetting status for {verification_id} "
             f"from {verification['status']} → awaiting_confirmation"
         )
-        update_verification_status(verification_id, "awaiting_confirmation")
+        try:
+            await update_verification_status(verification_id, "awaiting_confirmation")
+        except RepositoryError:
+            raise HTTPException(status_code=503, detail="Database unavailable, please retry")
 
     # 3) Normalize incoming specs
     if isinstance(specifications, str):
@@ -930,12 +1365,22 @@ async def confirm_specifications(
 
     if spec_draft and spec_str != spec_draft:
         logger.warning(f"Provided specs differ from draft")
+    if verification_id in speculative_cvl_tasks:
+        logger.info(f"Precomputed CVL for {verification_id} will be "
+                    f"{'used' if spec_str == speculative_cvl_tasks[verification_id][0] else 'partially reused if ready'}")
 
     # 4) Update status → 'running' and save the draft
-    update_verification_status(verification_id, "running", {"logs": ["Deep verification initiated", "Specifications confirmed by user", "Running formal verification"]}, spec_str)
+    try:
+        await update_verification_status(verification_id, "running", {"logs": ["Deep verification initiated", "Specifications confirmed by user", "Running formal verification"]}, spec_str)
+    except RepositoryError:
+        raise HTTPException(status_code=503, detail="Database unavailable, please retry")
 
     # 5) Launch background task
     background_tasks.add_task(
+        run_profiled,
+        "finalize_deep_verification",
+        verification_id,
+        profile,
         finalize_deep_verification,
         verification["project_id"],
         verification_id,
@@ -951,24 +1396,52 @@ async def confirm_specifications(
 
 
 @app.get("/verification/{verification_id}")
-async def get_verification_status(verification_id: str):
+async def get_verification_status(
+    verification_id: str,
+    fields: Optional[str] = Query(None, description="Comma separated list of columns to return, e.g. status,logs")):
     """Get status of a verification job"""
     logger.info(f"Getting verification status for ID {verification_id}")
+    columns = parse_fields(fields)
     try:
-        response = supabase_client.table("verification_results").select("*").eq("id", verification_id).execute()
+        verification = await repository.get_verification(verification_id, columns)
         
-        if not response.data or len(response.data) == 0:
+        if not verification:
             logger.error(f"Verification record with ID {verification_id} not found")
             raise HTTPException(status_code=404, detail=f"Verification record with ID {verification_id} not found")
         
         logger.info(f"Successfully retrieved verification status for ID {verification_id}")
-        return response.data[0]
+        return verification
     except HTTPException:
         raise
+    except RepositoryError as e:
+        logger.error(f"Database error fetching verification status: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable, please retry")
     except Exception as e:
         logger.error(f"Error fetching verification status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching verification status: {str(e)}")
 
+@app.get("/verification/{verification_id}/profile")
+async def get_verification_profile(
+    verification_id: str,
+    format: str = Query("json", description="json for spans and stacks, folded for flamegraph/speedscope stacks")):
+    """Download the profile recorded for a verification's background jobs"""
+    try:
+        path = profile_path(PROFILE_DIR, verification_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"No profile recorded for verification {verification_id}")
+    
+    if format == "folded":
+        with open(path) as profile_file:
+            artifact = json.load(profile_file)
+        return PlainTextResponse(folded_stacks(artifact), headers={
+            "Content-Disposition": f'attachment; filename="profile_{verification_id}.folded"'
+        })
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or folded")
+    return FileResponse(path, media_type="application/json", filename=f"profile_{verification_id}.json")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -978,10 +1451,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (full verification records with specs, CVL and logs)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+@app.on_event("shutdown")
+def shutdown_slither_pool():
+    shutdown_analysis_pool()
+
+@app.on_event("shutdown")
+def cancel_speculative_cvl():
+    for _, task in speculative_cvl_tasks.values():
+        task.cancel()
+    speculative_cvl_tasks.clear()
+
+@app.on_event("shutdown")
+async def close_repository():
+    await repository.close()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "ok",
+        "timestamp": datetime.now().isoformat(),
+        "ai_providers": llm_router.snapshot() if llm_router else {}
+    }
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Profile of the job running in the current context. Copied into tasks and
+# asyncio.to_thread calls, so spans anywhere below a job end up in its profile.
+_current_profile = contextvars.ContextVar("job_profile", default=None)
+
+# Leaf frames of threads parked waiting for work; dropped so samples reflect busy code
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_save_lock = threading.Lock()
+
+
+class Span:
+    """Handle returned by span(); set() adds attributes such as payload sizes"""
+
+    def __init__(self, record: Optional[Dict[str, Any]] = None):
+        self.record = record
+
+    def __bool__(self):
+        return self.record is not None
+
+    def set(self, **attrs):
+        if self.record is not None:
+            self.record.update(attrs)
+
+
+_NO_SPAN = Span()
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Time a block as part of the current job's profile; a no-op when no job is being profiled"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield _NO_SPAN
+        return
+    record = {"kind": kind, "name": name, "start": round(time.perf_counter() - profile.started, 6),
+              "thread": threading.current_thread().name, **attrs}
+    started = time.perf_counter()
+    try:
+        yield Span(record)
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        record["duration"] = round(time.perf_counter() - started, 6)
+        profile.add_span(record)
+
+
+def should_profile(requested: bool, sample_rate: float) -> bool:
+    return requested or (sample_rate > 0 and random.random() < sample_rate)
+
+
+class JobProfile:
+    """Spans and sampled Python stacks of one background job
+
+    Stacks of every thread in the process are sampled while the job runs
+    (concurrent jobs show up too, under their own thread names) and kept as
+    folded stack counts, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, job: str, verification_id: str, interval: float = 0.01):
+        self.job = job
+        self.verification_id = verification_id
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+        self.duration = None
+        self.spans = []
+        self.stacks = {}
+        self.samples = 0
+        self.closed = False
+        self.token = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{verification_id[:8]}", daemon=True)
+
+    def add_span(self, record: Dict[str, Any]):
+        with self.lock:
+            # Work the job left behind (e.g. speculative tasks) may finish after it
+            if not self.closed:
+                self.spans.append(record)
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        names = {}
+        while not self.stop_event.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                folded = ";".join(reversed(stack))
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self.token = _current_profile.set(self)
+        self.sampler.start()
+
+    def stop(self):
+        _current_profile.reset(self.token)
+        self.stop_event.set()
+        self.sampler.join()
+        with self.lock:
+            self.closed = True
+        self.duration = round(time.perf_counter() - self.started, 6)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job": self.job,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "sample_interval": self.interval,
+            "samples": self.samples,
+            "spans": sorted(self.spans, key=lambda record: record["start"]),
+            "stacks": dict(sorted(self.stacks.items(), key=lambda item: -item[1]))
+        }
+
+    def save(self, directory: str) -> str:
+        """Append this job to the verification's profile artifact and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = profile_path(directory, self.verification_id)
+        with _save_lock:
+            artifact = {"verification_id": self.verification_id, "jobs": []}
+            if os.path.exists(path):
+                with open(path) as profile_file:
+                    artifact = json.load(profile_file)
+            artifact["jobs"].append(self.to_dict())
+            with open(path, "w") as profile_file:
+                json.dump(artifact, profile_file)
+        return path
+
+
+def profile_path(directory: str, verification_id: str) -> str:
+    # Verification IDs are UUIDs, never let one escape the profile directory
+    if not verification_id or os.path.basename(verification_id) != verification_id or verification_id.startswith("."):
+        raise ValueError(f"Invalid verification ID: {verification_id}")
+    return os.path.join(directory, f"{verification_id}.json")
+
+
+def folded_stacks(artifact: Dict[str, Any]) -> str:
+    """All jobs' samples in the folded format read by flamegraph.pl and speedscope"""
+    totals = {}
+    for job in artifact.get("jobs", []):
+        for stack, count in job.get("stacks", {}).items():
+            key = f"{job['job']};{stack}"
+            totals[key] = totals.get(key, 0) + count
+    return "".join(f"{stack} {count}\n" for stack, count in totals.items())
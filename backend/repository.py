@@ -0,0 +1,163 @@
+import uuid
+import copy
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+
+import httpx
+
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+class RepositoryError(Exception):
+    """Raised when the data store rejects or fails a request"""
+
+
+class Repository:
+    """Async data access for projects and verification results"""
+
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def get_verification(self, verification_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def create_verification(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def update_verification(self, verification_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a record and return its id ({"id": ...}), or None when no record matched
+
+        The updated row is not returned: progress updates are frequent and
+        the row carries the spec draft, CVL code and logs.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class SupabaseRepository(Repository):
+    """Repository backed by Supabase's PostgREST API over a pooled async HTTP client
+
+    At most max_concurrency requests are in flight at once; further calls wait
+    for a slot instead of opening more connections.
+    """
+
+    def __init__(self, url: str, key: str, max_connections: int = 20, max_concurrency: int = 20,
+                 timeout: float = 10, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=representation"
+        }
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        # Tests pass an httpx.MockTransport
+        self.transport = transport
+        self.client = None
+        self.semaphore = None
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created lazily so the client and semaphore belong to the running event loop
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport
+            )
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.client
+
+    async def _send(self, method: str, table: str, params: Dict[str, str],
+                    json_body: Optional[Dict[str, Any]] = None, prefer: Optional[str] = None) -> httpx.Response:
+        client = self._client()
+        headers = {"Prefer": prefer} if prefer else None
+        with span("supabase", f"{method} {table}") as request_span:
+            async with self.semaphore:
+                try:
+                    response = await client.request(method, f"/{table}", params=params, json=json_body, headers=headers)
+                except httpx.HTTPError as e:
+                    raise RepositoryError(f"{method} {table} failed: {str(e)}")
+            request_span.set(status=response.status_code, request_bytes=len(response.request.content),
+                             response_bytes=len(response.content))
+        if response.status_code >= 400:
+            raise RepositoryError(f"{method} {table} failed with {response.status_code}: {response.text}")
+        return response
+
+    async def _request(self, method: str, table: str, params: Dict[str, str],
+                       json_body: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        response = await self._send(method, table, params, json_body)
+        return response.json() if response.content else []
+
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._request("GET", "projects", {"id": f"eq.{project_id}", "select": "*"})
+        return rows[0] if rows else None
+
+    async def get_verification(self, verification_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+        rows = await self._request("GET", "verification_results", {"id": f"eq.{verification_id}", "select": columns})
+        return rows[0] if rows else None
+
+    async def create_verification(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        rows = await self._request("POST", "verification_results", {}, data)
+        if not rows:
+            raise RepositoryError("Insert returned no data")
+        return rows[0]
+
+    async def update_verification(self, verification_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Only the number of matched rows comes back, in Content-Range (e.g. "*/1")
+        response = await self._send("PATCH", "verification_results", {"id": f"eq.{verification_id}"}, data,
+                                    prefer="return=minimal,count=exact")
+        matched = response.headers.get("content-range", "").rpartition("/")[2]
+        if matched.isdigit() and int(matched) == 0:
+            return None
+        return {"id": verification_id}
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class InMemoryRepository(Repository):
+    """Repository kept in process memory, for offline runs and tests"""
+
+    def __init__(self, projects: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.projects = projects if projects is not None else {}
+        self.verifications = {}
+
+    def add_project(self, code: str, name: str = "Contract", project_id: Optional[str] = None) -> Dict[str, Any]:
+        project_id = project_id or str(uuid.uuid4())
+        self.projects[project_id] = {"id": project_id, "name": name, "code": code}
+        return self.projects[project_id]
+
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        project = self.projects.get(project_id)
+        return copy.deepcopy(project) if project else None
+
+    async def get_verification(self, verification_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+        record = self.verifications.get(verification_id)
+        if record is None:
+            return None
+        if columns == "*":
+            return copy.deepcopy(record)
+        return {column: copy.deepcopy(record.get(column)) for column in columns.split(",")}
+
+    async def create_verification(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"id": str(uuid.uuid4()), **copy.deepcopy(data)}
+        self.verifications[record["id"]] = record
+        return copy.deepcopy(record)
+
+    async def update_verification(self, verification_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        record = self.verifications.get(verification_id)
+        if record is None:
+            return None
+        record.update(copy.deepcopy(data))
+        return {"id": verification_id}
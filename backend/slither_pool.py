@@ -0,0 +1,251 @@
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from typing import Optional, Dict, Any, List
+
+from analyzer_output import slim_slither_finding
+
+logger = logging.getLogger(__name__)
+
+
+class SlitherPoolError(Exception):
+    """Raised when the worker pool itself fails (not when the analysis reports an error)"""
+
+
+class SlitherPoolTimeout(SlitherPoolError):
+    """Raised when a worker does not answer within the job timeout"""
+
+
+def available_cores() -> int:
+    """Number of cores this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def current_rss_mb() -> float:
+    """Resident set size of the current process in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def select_detectors(detector_classes: List[type], cli_args: List[str]) -> List[type]:
+    """Apply the subset of Slither CLI detector flags used by our profiles to detector classes"""
+    from slither.detectors.abstract_detector import DetectorClassification
+
+    include = None
+    exclude = set()
+    excluded_impacts = set()
+    impact_flags = {
+        "--exclude-informational": DetectorClassification.INFORMATIONAL,
+        "--exclude-optimization": DetectorClassification.OPTIMIZATION,
+        "--exclude-low": DetectorClassification.LOW,
+        "--exclude-medium": DetectorClassification.MEDIUM,
+        "--exclude-high": DetectorClassification.HIGH,
+    }
+
+    args = iter(cli_args)
+    for arg in args:
+        if arg == "--detect":
+            include = set(next(args, "").split(","))
+        elif arg == "--exclude":
+            exclude.update(next(args, "").split(","))
+        elif arg in impact_flags:
+            excluded_impacts.add(impact_flags[arg])
+        else:
+            raise ValueError(f"Unsupported Slither argument for worker pool: {arg}")
+
+    selected = []
+    for detector in detector_classes:
+        if include is not None and detector.ARGUMENT not in include:
+            continue
+        if detector.ARGUMENT in exclude or detector.IMPACT in excluded_impacts:
+            continue
+        selected.append(detector)
+    return selected
+
+
+def _worker_main(conn, max_jobs: int, max_rss_mb: float):
+    """Worker process loop: import Slither once, then serve analysis jobs over a pipe"""
+    try:
+        import inspect
+        from slither import Slither
+        from slither.detectors import all_detectors
+        from slither.detectors.abstract_detector import AbstractDetector
+
+        detector_classes = [
+            obj for _, obj in inspect.getmembers(all_detectors, inspect.isclass)
+            if issubclass(obj, AbstractDetector)
+        ]
+    except Exception as e:
+        conn.send(("startup_error", f"Failed to import Slither: {str(e)}", False))
+        conn.close()
+        return
+
+    conn.send(("ready", None, False))
+    jobs_done = 0
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        contract_file_path, cli_args = job
+        try:
+            slither = Slither(contract_file_path)
+            for detector in select_detectors(detector_classes, cli_args):
+                slither.register_detector(detector)
+            findings = [slim_slither_finding(finding) for results in slither.run_detectors() for finding in results]
+            # Same shape as `slither --json -`
+            payload = ("ok", {"success": True, "error": None, "results": {"detectors": findings}})
+        except Exception as e:
+            payload = ("error", str(e))
+
+        jobs_done += 1
+        recycle = jobs_done >= max_jobs or current_rss_mb() >= max_rss_mb
+        conn.send((*payload, recycle))
+        if recycle:
+            break
+    conn.close()
+
+
+class SlitherWorker:
+    """A single long-lived Slither worker process"""
+
+    def __init__(self, ctx, max_jobs: int, max_rss_mb: float, startup_timeout: float):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, max_jobs, max_rss_mb),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        if not self.conn.poll(startup_timeout):
+            self.stop()
+            raise SlitherPoolError("Slither worker did not start in time")
+        try:
+            status, message, _ = self.conn.recv()
+        except EOFError:
+            status, message = "startup_error", f"Slither worker exited with code {self.process.exitcode}"
+        if status != "ready":
+            self.stop()
+            raise SlitherPoolError(message)
+
+    def run(self, contract_file_path: str, cli_args: List[str], timeout: float):
+        """Send a job to the worker and wait for (status, result, recycle)"""
+        try:
+            self.conn.send((contract_file_path, cli_args))
+            if not self.conn.poll(timeout):
+                raise SlitherPoolTimeout(f"Slither worker timed out after {timeout}s")
+            return self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            raise SlitherPoolError(f"Slither worker died: {str(e)}")
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SlitherWorkerPool:
+    """Pool of warm Slither worker processes using the Python API instead of the CLI
+
+    Workers import Slither and register detectors once, then serve jobs until
+    they have handled max_jobs analyses or their RSS exceeds max_rss_mb, at
+    which point they are replaced with a fresh process.
+    """
+
+    def __init__(self, size: Optional[int] = None, max_jobs: int = 50, max_rss_mb: float = 1024,
+                 job_timeout: float = 300, startup_timeout: float = 60):
+        self.size = size or available_cores()
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.job_timeout = job_timeout
+        self.startup_timeout = startup_timeout
+        self.ctx = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = 0
+        self.closed = False
+
+    def _spawn(self) -> SlitherWorker:
+        return SlitherWorker(self.ctx, self.max_jobs, self.max_rss_mb, self.startup_timeout)
+
+    def _acquire(self) -> SlitherWorker:
+        # Start workers lazily up to the pool size, then wait for an idle one
+        while True:
+            with self.lock:
+                if self.closed:
+                    raise SlitherPoolError("Slither worker pool is closed")
+                try:
+                    return self.idle.get_nowait()
+                except queue.Empty:
+                    if self.started < self.size:
+                        self.started += 1
+                        break
+            try:
+                # Re-check periodically since a recycled worker frees a slot without being queued
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue
+        try:
+            return self._spawn()
+        except Exception as e:
+            # Slither cannot be started in-process here, stop trying so callers fall back quickly
+            logger.error(f"Disabling Slither worker pool: {str(e)}")
+            with self.lock:
+                self.started -= 1
+                self.closed = True
+            raise SlitherPoolError(str(e))
+
+    def _release(self, worker: SlitherWorker, healthy: bool):
+        if healthy and not self.closed:
+            self.idle.put(worker)
+            return
+        worker.stop()
+        with self.lock:
+            self.started -= 1
+        logger.info("Recycled Slither worker")
+
+    def run(self, contract_file_path: str, cli_args: List[str]) -> Dict[str, Any]:
+        """Analyze a contract on a warm worker and return the Slither JSON report"""
+        worker = self._acquire()
+        healthy = False
+        try:
+            status, result, recycle = worker.run(contract_file_path, cli_args, self.job_timeout)
+            healthy = not recycle
+        finally:
+            self._release(worker, healthy)
+
+        if status != "ok":
+            return {"error": result}
+        return result
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
@@ -0,0 +1,227 @@
+import re
+from typing import Dict, Any, List
+
+UNIT_PATTERN = re.compile(r"\b(abstract\s+contract|contract|library|interface)\s+(\w+)[^{;]*\{")
+# Modifiers are left out on purpose so they stay in the unit header every chunk carries
+FUNCTION_PATTERN = re.compile(r"\b(function\s+\w+|constructor|fallback|receive)\s*\(")
+ITEM_PATTERN = re.compile(r"^\s*(\d+)[.)]\s+(.*)$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for source code and English (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def mask_comments_and_strings(code: str) -> str:
+    """Replace comments and string literals with spaces so offsets stay valid for brace matching"""
+    masked = list(code)
+    i = 0
+    length = len(code)
+    while i < length:
+        if code.startswith("//", i):
+            end = code.find("\n", i)
+            end = length if end == -1 else end
+        elif code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            end = length if end == -1 else end + 2
+        elif code[i] in "\"'":
+            quote = code[i]
+            end = i + 1
+            while end < length and code[end] != quote:
+                end += 2 if code[end] == "\\" else 1
+            end = min(end + 1, length)
+        else:
+            i += 1
+            continue
+        for j in range(i, end):
+            if masked[j] != "\n":
+                masked[j] = " "
+        i = end
+    return "".join(masked)
+
+
+def find_block_end(masked: str, open_index: int) -> int:
+    """Index just past the brace that closes the block opened at open_index"""
+    depth = 0
+    for i in range(open_index, len(masked)):
+        if masked[i] == "{":
+            depth += 1
+        elif masked[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(masked)
+
+
+def split_solidity_source(code: str) -> List[Dict[str, Any]]:
+    """Split Solidity source into contracts, libraries and interfaces with their functions
+
+    Each unit contains its name, kind, full source, a header (the unit with all
+    functions removed but state variables, events and modifiers kept, used as
+    context), the list of function sources and the offset of each function in
+    the original code.
+    """
+    masked = mask_comments_and_strings(code)
+    units = []
+    position = 0
+    while True:
+        match = UNIT_PATTERN.search(masked, position)
+        if not match:
+            break
+        open_index = match.end() - 1
+        end = find_block_end(masked, open_index)
+        unit_masked = masked[match.start():end]
+        unit_code = code[match.start():end]
+
+        functions = []
+        function_offsets = []
+        header_parts = []
+        cursor = 0
+        offset = 0
+        while True:
+            fn = FUNCTION_PATTERN.search(unit_masked, offset)
+            if not fn:
+                break
+            # The function either has a body or ends with ';' (interfaces, abstract functions)
+            brace = unit_masked.find("{", fn.end())
+            semicolon = unit_masked.find(";", fn.end())
+            if brace == -1 or (semicolon != -1 and semicolon < brace):
+                fn_end = semicolon + 1 if semicolon != -1 else len(unit_masked)
+            else:
+                fn_end = find_block_end(unit_masked, brace)
+            # Take the whole line when the function starts its own line to keep indentation
+            fn_start = unit_code.rfind("\n", 0, fn.start()) + 1
+            if unit_masked[fn_start:fn.start()].strip():
+                fn_start = fn.start()
+            header_parts.append(unit_code[cursor:fn_start])
+            functions.append(unit_code[fn_start:fn_end])
+            function_offsets.append(match.start() + fn_start)
+            cursor = fn_end
+            offset = fn_end
+        header_parts.append(unit_code[cursor:])
+
+        units.append({
+            "name": match.group(2),
+            "kind": match.group(1).split()[-1],
+            "code": unit_code,
+            "header": re.sub(r"\n\s*\n+", "\n", "".join(header_parts)),
+            "functions": functions,
+            "function_offsets": function_offsets
+        })
+        position = end
+    return units
+
+
+def file_level_source(code: str) -> str:
+    """Everything outside contracts, libraries and interfaces
+
+    Pragmas, imports and file-level structs, enums, constants, errors, user
+    defined value types and free functions.
+    """
+    masked = mask_comments_and_strings(code)
+    parts = []
+    position = 0
+    while True:
+        match = UNIT_PATTERN.search(masked, position)
+        if not match:
+            break
+        parts.append(code[position:match.start()])
+        position = find_block_end(masked, match.end() - 1)
+    parts.append(code[position:])
+    return re.sub(r"\n\s*\n+", "\n", "".join(parts)).strip()
+
+
+def build_chunks(code: str, max_tokens: int) -> List[Dict[str, Any]]:
+    """Group the source into prompt-sized chunks
+
+    Small units are packed together whole. Units larger than max_tokens are
+    split by function, and every piece carries the unit header (state
+    variables, events, modifiers) so the model keeps the context. The
+    file-level declarations are prepended to every chunk.
+    """
+    units = split_solidity_source(code)
+    if not units:
+        return [{"label": "source", "code": code}]
+
+    file_level = file_level_source(code)
+    prefix = file_level + "\n\n" if file_level else ""
+    max_tokens = max(1, max_tokens - estimate_tokens(prefix)) if prefix else max_tokens
+
+    chunks = []
+    packed, packed_names, packed_tokens = [], [], 0
+
+    def flush_packed():
+        nonlocal packed, packed_names, packed_tokens
+        if packed:
+            chunks.append({"label": ", ".join(packed_names), "code": prefix + "\n\n".join(packed)})
+        packed, packed_names, packed_tokens = [], [], 0
+
+    for unit in units:
+        unit_tokens = estimate_tokens(unit["code"])
+        if unit_tokens <= max_tokens:
+            if packed_tokens + unit_tokens > max_tokens:
+                flush_packed()
+            packed.append(unit["code"])
+            packed_names.append(unit["name"])
+            packed_tokens += unit_tokens
+            continue
+
+        flush_packed()
+        # Reopen the unit so the selected functions are placed back inside it
+        header = unit["header"].rstrip()
+        header = header[:-1].rstrip() if header.endswith("}") else header
+        header_tokens = estimate_tokens(header)
+        group, group_tokens, part = [], header_tokens, 1
+        for function in unit["functions"]:
+            function_tokens = estimate_tokens(function)
+            if group and group_tokens + function_tokens > max_tokens:
+                chunks.append({
+                    "label": f"{unit['name']} (part {part})",
+                    "code": prefix + header + "\n\n" + "\n\n".join(group) + "\n}"
+                })
+                group, group_tokens, part = [], header_tokens, part + 1
+            group.append(function)
+            group_tokens += function_tokens
+        if group or part == 1:
+            chunks.append({
+                "label": f"{unit['name']} (part {part})" if part > 1 else unit["name"],
+                "code": prefix + header + "\n\n" + "\n\n".join(group) + "\n}"
+            })
+    flush_packed()
+    return chunks
+
+
+def normalize_spec_item(item: str) -> str:
+    """Key used to detect duplicate specification items across fragments"""
+    item = item.lower().replace("`", "")
+    item = re.sub(r"[^\w\s]", " ", item)
+    return re.sub(r"\s+", " ", item).strip()
+
+
+def extract_spec_items(fragment: str) -> List[str]:
+    """Return the items of a numbered list, joining continuation lines to their item"""
+    items = []
+    for line in fragment.splitlines():
+        match = ITEM_PATTERN.match(line)
+        if match:
+            items.append(match.group(2).strip())
+        elif items and line.strip() and not line.lstrip().startswith("#"):
+            items[-1] += " " + line.strip()
+    return items
+
+
+def merge_spec_fragments(fragments: List[str]) -> str:
+    """Merge per-chunk specifications into a single deduplicated numbered list"""
+    seen = set()
+    merged = []
+    for fragment in fragments:
+        items = extract_spec_items(fragment)
+        if not items and fragment.strip():
+            # The model ignored the numbered format, keep the whole fragment as one item
+            items = [fragment.strip()]
+        for item in items:
+            key = normalize_spec_item(item)
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return "\n".join(f"{index}. {item}" for index, item in enumerate(merged, start=1))
@@ -0,0 +1,38 @@
+from analysis import merge_findings
+from linters import make_finding
+
+
+def slither_finding(check, impact, *ranges):
+    return {
+        "check": check, "impact": impact, "description": check, "id": f"{check}-{ranges[0][0]}", "analyzer": "slither",
+        "elements": [{"type": "node", "source_mapping": {"filename_short": "A.sol", "lines": list(lines)}} for lines in ranges]
+    }
+
+
+def report(*findings):
+    return {"results": {"detectors": list(findings)}}
+
+
+def test_statement_finding_merges_into_slither_range():
+    slither = slither_finding("tx-origin", "Medium", range(5, 12))
+    lint = make_finding("lint", "lint-tx-origin", "Low", "lint", "A.sol", 8, "Low", "tx-origin")
+    merged = merge_findings([report(lint), report(slither)])
+    assert len(merged) == 1
+    assert merged[0]["check"] == "tx-origin"
+    assert merged[0]["impact"] == "Medium"
+    assert merged[0]["analyzers"] == ["slither", "lint"]
+    assert merged[0]["elements"][0]["source_mapping"]["lines"] == list(range(5, 12))
+
+
+def test_findings_outside_the_range_or_of_another_cause_stay_separate():
+    slither = slither_finding("tx-origin", "Medium", range(5, 12))
+    outside = make_finding("lint", "lint-tx-origin", "Low", "lint", "A.sol", 20, "Low", "tx-origin")
+    other = make_finding("solc", "solc-unused-local-variable", "Low", "solc", "A.sol", 8, "High")
+    merged = merge_findings([report(slither), report(outside, other)])
+    assert [finding["check"] for finding in merged] == ["tx-origin", "lint-tx-origin", "solc-unused-local-variable"]
+
+
+def test_slither_findings_are_not_merged_with_each_other():
+    outer = slither_finding("reentrancy-eth", "High", range(5, 12))
+    inner = slither_finding("reentrancy-eth", "High", [7])
+    assert len(merge_findings([report(outer, inner)])) == 2
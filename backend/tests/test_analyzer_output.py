@@ -0,0 +1,104 @@
+import io
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+import analyzer_output
+from analyzer_output import OutputTooLarge, extract_certora_results, extract_slither_results, run_to_spool
+
+SLITHER_REPORT = {
+    "success": True,
+    "error": None,
+    "results": {"detectors": [{
+        "check": "reentrancy-eth",
+        "impact": "High",
+        "confidence": "Medium",
+        "description": "Reentrancy in Vault.withdraw() (Vault.sol#10-20)",
+        "id": "abc",
+        "markdown": "x" * 1000,
+        "elements": [{
+            "type": "function",
+            "name": "withdraw",
+            "source_mapping": {"filename_short": "Vault.sol", "lines": [10, 11, 12], "content": "function withdraw() {}"},
+            "type_specific_fields": {"signature": "withdraw()"}
+        }]
+    }]}
+}
+
+CALL_TRACE = {"children": [
+    {"message": "setup", "children": []},
+    {"message": "call", "location": {"file": "/work/src/Vault.sol", "line": 14}, "children": [{"values": list(range(50))}]}
+]}
+
+
+@pytest.fixture(params=["ijson", "json"])
+def parser(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(analyzer_output, "ijson", None)
+    elif analyzer_output.ijson is None:
+        pytest.skip("ijson is not installed")
+    return request.param
+
+
+def test_run_to_spool_keeps_stdout_and_stderr_tail():
+    result = run_to_spool([sys.executable, "-c", "import sys; print('out'); sys.stderr.write('err')"], max_bytes=1024)
+    try:
+        assert result.returncode == 0
+        assert result.stdout.read() == b"out\n"
+        assert result.stderr_tail == "err"
+    finally:
+        result.close()
+
+
+def test_run_to_spool_rejects_output_over_the_cap():
+    with pytest.raises(OutputTooLarge):
+        run_to_spool([sys.executable, "-c", "print('x' * 200000)"], max_bytes=1024, poll_interval=0.01)
+
+
+def test_run_to_spool_kills_the_process_on_timeout():
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_to_spool([sys.executable, "-c", "import time; time.sleep(30)"], max_bytes=1024, timeout=0.3, poll_interval=0.05)
+    assert time.monotonic() - started < 5
+
+
+def test_slither_report_is_slimmed(parser):
+    report = extract_slither_results(io.BytesIO(json.dumps(SLITHER_REPORT).encode()))
+    assert report["success"] is True and report["error"] is None
+    finding = report["results"]["detectors"][0]
+    assert finding["check"] == "reentrancy-eth" and finding["id"] == "abc"
+    assert "markdown" not in finding
+    assert finding["elements"] == [{
+        "type": "function",
+        "name": "withdraw",
+        "source_mapping": {"filename_short": "Vault.sol", "lines": [10, 11, 12]}
+    }]
+
+
+def test_certora_list_format_reduces_call_traces_to_a_line_hint(parser):
+    output = {
+        "success": False,
+        "rules": [{
+            "name": "withdrawKeepsSolvency",
+            "status": "VIOLATED",
+            "assertMessage": "solvency",
+            "callTrace": CALL_TRACE,
+            "children": [{"name": "withdraw()", "status": "VIOLATED", "callTrace": CALL_TRACE}]
+        }],
+        "assertMessages": {"withdrawKeepsSolvency": "solvency"}
+    }
+    result = extract_certora_results(io.BytesIO(json.dumps(output).encode()))
+    assert result["success"] is False
+    assert result["assertMessages"] == {"withdrawKeepsSolvency": "solvency"}
+    rule = result["rules"][0]
+    assert rule["callTrace"] == {"file": "Vault.sol", "line": 14}
+    assert rule["children"] == [{"name": "withdraw()", "status": "VIOLATED", "callTrace": {"file": "Vault.sol", "line": 14}}]
+
+
+def test_certora_legacy_map_format_is_kept(parser):
+    output = {"rules": {"transferPreservesSupply": "SUCCESS", "parametric": {"FAIL": ["withdraw()"]}}}
+    result = extract_certora_results(io.BytesIO(json.dumps(output).encode()))
+    assert result["rules"] == output["rules"]
@@ -0,0 +1,106 @@
+from certora_parser import collect_rule_verdicts, parse_certora_results
+
+CVL = """
+invariant totalSupplyIsSum()
+    totalSupply() == sumOfBalances;
+
+rule transferPreservesSupply(address to, uint256 amount) {
+    assert true;
+}
+"""
+
+
+def by_title(result):
+    return {issue["title"]: issue for issue in result["results"]}
+
+
+def test_legacy_format_simple_rules():
+    result = parse_certora_results({
+        "rules": {
+            "transferPreservesSupply": "SUCCESS",
+            "totalSupplyIsSum": "FAIL",
+            "slowRule": "TIMEOUT",
+        },
+        "assertMessages": {"totalSupplyIsSum": "totalSupply() == sumOfBalances"}
+    }, CVL, "contract_1.sol")
+
+    issues = by_title(result)
+    assert "error" not in result
+    assert issues["Invariant totalSupplyIsSum Violated"]["severity"] == "critical"
+    assert "totalSupply() == sumOfBalances" in issues["Invariant totalSupplyIsSum Violated"]["description"]
+    assert issues["Rule slowRule Timed Out"]["severity"] == "medium"
+    assert all(issue["file"] == "contract_1.sol" for issue in result["results"])
+    assert "1 properties verified" in result["logs"]
+
+
+def test_legacy_format_parametric_rule_lists_methods_per_status():
+    certora_results = {
+        "rules": {
+            "parametric": {
+                "SUCCESS": ["deposit(uint256)", "transfer(address,uint256)"],
+                "FAIL": ["withdraw(uint256)"],
+                "TIMEOUT": [],
+                "SANITY_FAIL": [],
+                "UNKNOWN": []
+            }
+        }
+    }
+
+    verdicts = collect_rule_verdicts(certora_results)
+    assert [(v["method"], v["verdict"]) for v in verdicts] == [
+        ("deposit(uint256)", "verified"),
+        ("transfer(address,uint256)", "verified"),
+        ("withdraw(uint256)", "violated"),
+    ]
+
+    result = parse_certora_results(certora_results, CVL)
+    assert len(result["results"]) == 1
+    issue = result["results"][0]
+    assert issue["title"] == "Rule parametric Violated"
+    assert "withdraw(uint256)" in issue["description"]
+    assert (issue["type"], issue["severity"]) == ("error", "high")
+
+
+def test_report_format_with_children_and_call_trace():
+    result = parse_certora_results({
+        "rules": [
+            {"name": "totalSupplyIsSum", "status": "VERIFIED", "ruleType": "invariant"},
+            {
+                "name": "noFreeMoney",
+                "status": "VIOLATED",
+                "children": [
+                    {"name": "deposit(uint256)", "status": "VERIFIED"},
+                    {
+                        "name": "withdraw(uint256)",
+                        "status": "VIOLATED",
+                        "assertMessage": "balance decreased",
+                        "callTrace": {"file": "src/Vault.sol", "line": 42}
+                    }
+                ]
+            },
+            {"name": "emptyRule", "status": "SANITY_FAILED"}
+        ]
+    }, CVL, "contract_1.sol")
+
+    issues = by_title(result)
+    violated = issues["Rule noFreeMoney Violated"]
+    assert violated["severity"] == "high"
+    assert violated["line"] == [42]
+    assert violated["file"] == "Vault.sol"
+    assert "balance decreased" in violated["description"]
+    assert issues["Rule emptyRule Is Vacuous"]["severity"] == "medium"
+    assert "2 properties verified" in result["logs"]
+
+
+def test_prover_failure_is_an_error():
+    result = parse_certora_results({"success": False, "error": "compilation failed"})
+    assert result["error"] == "compilation failed"
+    assert result["results"] == []
+
+
+def test_missing_rule_verdicts_are_an_error():
+    # run_prover returns this when certoraRun exits cleanly without printing a report
+    for certora_results in ({"success": True}, {"rules": {}}, {"rules": []}):
+        result = parse_certora_results(certora_results, CVL)
+        assert "error" in result
+        assert "Verification completed" not in result["logs"]
@@ -0,0 +1,86 @@
+from cvl_blocks import merge_edited_cvl, plan_spec_edit, split_cvl_by_spec
+
+DRAFT = """1. Balances never go negative.
+2. Transfers preserve total supply.
+3. Only the owner can mint."""
+
+CVL = """methods {
+    function balanceOf(address) external returns (uint256) envfree;
+}
+
+// spec 1
+rule balancesNonNegative(address a) { assert balanceOf(a) >= 0; }
+
+// spec 2
+rule transferPreservesSupply() { assert true; }
+
+// spec 3
+rule onlyOwnerMints() { assert true; }
+"""
+
+
+def test_split_cvl_by_spec():
+    preamble, blocks = split_cvl_by_spec(CVL)
+    assert preamble.strip().startswith("methods {")
+    assert sorted(blocks) == [1, 2, 3]
+    assert "transferPreservesSupply" in blocks[2]
+
+
+def test_duplicate_markers_are_kept_together():
+    _, blocks = split_cvl_by_spec(CVL + "\n// spec 2\ninvariant supplyMatches() true;\n")
+    assert "transferPreservesSupply" in blocks[2] and "supplyMatches" in blocks[2]
+
+
+def test_reordered_items_reuse_their_blocks_under_new_numbers():
+    _, blocks = split_cvl_by_spec(CVL)
+    approved = """1. Only the owner can mint.
+2. Balances never go negative.
+3. Transfers preserve total supply."""
+    reused, edited = plan_spec_edit(DRAFT, approved, blocks)
+    assert edited == []
+    assert "onlyOwnerMints" in reused[1] and reused[1].lstrip().startswith("// spec 1")
+    assert "balancesNonNegative" in reused[2]
+    assert "transferPreservesSupply" in reused[3]
+
+
+def test_renumbered_duplicate_markers_move_together():
+    _, blocks = split_cvl_by_spec(CVL + "\n// spec 2\ninvariant supplyMatches() true;\n")
+    approved = """1. Transfers preserve total supply.
+2. Balances never go negative."""
+    reused, _ = plan_spec_edit(DRAFT, approved, blocks)
+    _, renumbered = split_cvl_by_spec("\n".join(reused[number] for number in sorted(reused)))
+    assert "supplyMatches" in renumbered[1] and "supplyMatches" not in renumbered[2]
+
+
+def test_edited_and_added_items_are_regenerated():
+    _, blocks = split_cvl_by_spec(CVL)
+    approved = """1. Balances never go negative.
+2. Transfers never change total supply.
+3. Only the owner can mint.
+4. Burning reduces total supply."""
+    reused, edited = plan_spec_edit(DRAFT, approved, blocks)
+    assert sorted(reused) == [1, 3]
+    assert edited == [(2, "Transfers never change total supply."), (4, "Burning reduces total supply.")]
+
+    preamble, _ = split_cvl_by_spec(CVL)
+    regenerated = """ghost uint256 burned;
+
+// spec 2
+rule transferKeepsSupply() { assert true; }
+
+// spec 4
+rule burnReducesSupply() { assert true; }
+"""
+    merged = merge_edited_cvl(preamble, reused, regenerated, edited)
+    assert "ghost uint256 burned;" in merged
+    _, merged_blocks = split_cvl_by_spec(merged)
+    assert sorted(merged_blocks) == [1, 2, 3, 4]
+    assert "transferKeepsSupply" in merged_blocks[2] and "transferPreservesSupply" not in merged
+
+
+def test_regenerated_answer_missing_an_edited_item_is_rejected():
+    preamble, blocks = split_cvl_by_spec(CVL)
+    approved = DRAFT.replace("Only the owner can mint.", "Only minters can mint.") + "\n4. Burning reduces total supply."
+    reused, edited = plan_spec_edit(DRAFT, approved, blocks)
+    assert [number for number, _ in edited] == [3, 4]
+    assert merge_edited_cvl(preamble, reused, "// spec 3\nrule mintersMint() { assert true; }\n", edited) is None
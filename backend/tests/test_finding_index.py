@@ -0,0 +1,57 @@
+from finding_index import FindingIndex, findings_kind, function_fingerprints
+
+
+def contract(modifier_check: str, helper_body: str) -> str:
+    return f"""contract Vault {{
+    address owner;
+    uint total;
+    modifier onlyOwner() {{ require({modifier_check}); _; }}
+    function deposit(uint amount) external onlyOwner {{
+        total += scale(amount);
+    }}
+    function scale(uint amount) internal pure returns (uint) {{ {helper_body} }}
+}}
+"""
+
+
+def deposit_fingerprint(code: str) -> str:
+    return function_fingerprints(code)[0]["fingerprint"]
+
+
+def test_fingerprint_covers_modifiers_and_called_functions():
+    base = deposit_fingerprint(contract("msg.sender == owner", "return amount * 2;"))
+    assert deposit_fingerprint(contract("msg.sender == owner", "return amount * 2;")) == base
+    assert deposit_fingerprint(contract("true", "return amount * 2;")) != base
+    assert deposit_fingerprint(contract("msg.sender == owner", "return amount;")) != base
+    renamed = contract("msg.sender == owner", "return amount * 2;").replace("onlyOwner", "whenNotPaused")
+    assert deposit_fingerprint(renamed) != base
+
+
+def test_only_analyzer_findings_are_stored_with_neutral_text(tmp_path):
+    code = contract("msg.sender == owner", "return amount * 2;")
+    functions = function_fingerprints(code)
+    index = FindingIndex(str(tmp_path / "index.sqlite3"))
+    kind = findings_kind(["slither", "solc", "lint"], "exhaustive")
+    index.store_findings(functions, [{
+        "check": "reentrancy-eth", "impact": "High", "analyzer": "slither",
+        "description": "Reentrancy in Vault.deposit(uint256) (Vault.sol#5-7)",
+        "elements": [{"source_mapping": {"filename_short": "Vault.sol", "lines": [6]}}]
+    }], kind)
+    known = index.lookup_findings(functions, kind)
+    assert list(known) == [functions[0]["fingerprint"]]
+    issue = known[functions[0]["fingerprint"]][0]
+    assert issue["check"] == "reentrancy-eth" and issue["line"] == [6] and issue["severity"] == "high"
+    assert "Vault" not in issue["description"] and "deposit" not in issue["description"]
+    index.close()
+
+
+def test_findings_are_scoped_to_analyzers_and_profile(tmp_path):
+    functions = function_fingerprints(contract("msg.sender == owner", "return amount * 2;"))
+    index = FindingIndex(str(tmp_path / "index.sqlite3"))
+    index.store_findings(functions, [{
+        "check": "reentrancy-eth", "impact": "High",
+        "elements": [{"source_mapping": {"lines": [6]}}]
+    }], findings_kind(["slither"], "standard"))
+    assert index.lookup_findings(functions, findings_kind(["slither", "solc", "lint"], "exhaustive")) == {}
+    assert index.lookup_findings(functions, findings_kind(["slither"], "standard"))
+    index.close()
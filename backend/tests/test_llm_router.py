@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from llm_router import LLMProvider, LLMRouter, NoProviderAvailable, ProviderError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProvider(LLMProvider):
+    """Answers after latency seconds of the fake clock (or real sleep), failing while fail is set"""
+
+    def __init__(self, name, clock=None, latency=0.0, sleep=0.0, fail=False):
+        super().__init__(name, {"chat": f"{name}-chat"})
+        self.clock = clock
+        self.latency = latency
+        self.sleep = sleep
+        self.fail = fail
+        self.calls = 0
+        self.threads = []
+
+    def complete(self, model, system_prompt, content, timeout):
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        if self.clock is not None:
+            self.clock.now += self.latency
+        if self.sleep:
+            time.sleep(self.sleep)
+        if self.fail:
+            raise ProviderError(f"{self.name} is down")
+        return f"answer from {self.name}"
+
+
+def test_providers_are_ranked_by_latency():
+    clock = FakeClock()
+    slow = FakeProvider("slow", clock, latency=5.0)
+    fast = FakeProvider("fast", clock, latency=1.0)
+    router = LLMRouter([slow, fast], clock=clock)
+    # Unmeasured providers keep the configured order
+    assert [p.name for p in router.rank("chat")] == ["slow", "fast"]
+    router._call(slow, "chat", "system", "content", 30)
+    router._call(fast, "chat", "system", "content", 30)
+    assert [p.name for p in router.rank("chat")] == ["fast", "slow"]
+    assert router.complete("system", "content") == "answer from fast"
+    assert set(router.snapshot()) == {"slow/slow-chat", "fast/fast-chat"}
+
+
+def test_circuit_opens_after_failures_and_closes_after_cooldown():
+    clock = FakeClock()
+    flaky = FakeProvider("flaky", clock, fail=True)
+    backup = FakeProvider("backup", clock)
+    router = LLMRouter([flaky, backup], failure_threshold=2, cooldown=60, clock=clock)
+    for _ in range(2):
+        assert router.complete("system", "content") == "answer from backup"
+    assert [p.name for p in router.rank("chat")] == ["backup"]
+    assert router.snapshot()["flaky/flaky-chat"]["circuit_open"]
+
+    # Half-open after the cooldown: the next request probes the provider again
+    clock.now += 61
+    flaky.fail = False
+    assert "flaky" in [p.name for p in router.rank("chat")]
+    router._call(flaky, "chat", "system", "content", 30)
+    assert not router.snapshot()["flaky/flaky-chat"]["circuit_open"]
+
+
+def test_all_providers_failing_raises():
+    router = LLMRouter([FakeProvider("a", fail=True), FakeProvider("b", fail=True)])
+    with pytest.raises(NoProviderAvailable):
+        router.complete("system", "content")
+
+
+def test_slow_primary_is_hedged_with_the_next_provider():
+    slow = FakeProvider("slow", sleep=1.0)
+    fast = FakeProvider("fast")
+    router = LLMRouter([slow, fast], hedge=True, hedge_delay=0.05)
+    started = time.monotonic()
+    assert router.complete("system", "content") == "answer from fast"
+    assert time.monotonic() - started < 0.8
+    assert slow.calls == 1 and fast.calls == 1
+
+
+def test_unhedged_calls_run_on_the_callers_thread():
+    first = FakeProvider("first", fail=True)
+    second = FakeProvider("second")
+    router = LLMRouter([first, second], max_concurrency=2)
+    results = []
+
+    def call():
+        results.append(router.complete("system", "content"))
+
+    # More concurrent calls than executor threads, none of them may queue on it
+    threads = [threading.Thread(target=call, name=f"caller-{i}") for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer from second"] * 4
+    assert sorted(second.threads) == [f"caller-{i}" for i in range(4)]
+    assert not any(name.startswith("llm") for name in first.threads + second.threads)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from repository import InMemoryRepository, RepositoryError, SupabaseRepository
+
+
+def test_in_memory_repository_round_trip():
+    async def scenario():
+        repository = InMemoryRepository()
+        project = repository.add_project("contract A {}", project_id="p1")
+        fetched = await repository.get_project("p1")
+        fetched["code"] = "changed"
+        assert (await repository.get_project("p1"))["code"] == project["code"]
+        assert await repository.get_project("missing") is None
+
+        record = await repository.create_verification({"project_id": "p1", "status": "running", "logs": ["a"]})
+        assert await repository.update_verification(record["id"], {"status": "completed"}) == {"id": record["id"]}
+        assert await repository.update_verification("missing", {"status": "completed"}) is None
+        assert await repository.get_verification(record["id"], "id,status") == {"id": record["id"], "status": "completed"}
+        assert (await repository.get_verification(record["id"]))["logs"] == ["a"]
+        assert await repository.get_verification("missing") is None
+
+    asyncio.run(scenario())
+
+
+def supabase(handler, **kwargs) -> SupabaseRepository:
+    return SupabaseRepository("https://db.example.com/", "secret", transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_supabase_request_shape():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json=[{"id": "p1", "code": "contract A {}"}])
+        if request.method == "POST":
+            return httpx.Response(201, json=[{"id": "v1", **json.loads(request.content)}])
+        return httpx.Response(204, headers={"Content-Range": "*/1"})
+
+    async def scenario():
+        repository = supabase(handler)
+        assert (await repository.get_project("p1"))["id"] == "p1"
+        assert (await repository.create_verification({"status": "running"}))["id"] == "v1"
+        assert await repository.update_verification("v1", {"status": "completed"}) == {"id": "v1"}
+        await repository.close()
+
+    asyncio.run(scenario())
+    get, post, patch = requests
+    assert get.url.path == "/rest/v1/projects"
+    assert dict(get.url.params) == {"id": "eq.p1", "select": "*"}
+    assert get.headers["apikey"] == "secret" and get.headers["authorization"] == "Bearer secret"
+    assert post.headers["prefer"] == "return=representation"
+    assert patch.url.path == "/rest/v1/verification_results" and dict(patch.url.params) == {"id": "eq.v1"}
+    # Progress updates must not send the whole row back
+    assert patch.headers["prefer"] == "return=minimal,count=exact"
+    assert json.loads(patch.content) == {"status": "completed"}
+
+
+def test_supabase_update_of_missing_record_returns_none():
+    async def scenario():
+        repository = supabase(lambda request: httpx.Response(204, headers={"Content-Range": "*/0"}))
+        assert await repository.update_verification("missing", {"status": "completed"}) is None
+        await repository.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("handler", [
+    lambda request: httpx.Response(401, json={"message": "invalid key"}),
+    lambda request: httpx.Response(404, text="not found"),
+])
+def test_supabase_http_errors_raise_repository_error(handler):
+    async def scenario():
+        repository = supabase(handler)
+        with pytest.raises(RepositoryError):
+            await repository.get_verification("v1")
+        await repository.close()
+
+    asyncio.run(scenario())
+
+
+def test_supabase_transport_errors_raise_repository_error():
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def scenario():
+        repository = supabase(handler)
+        with pytest.raises(RepositoryError):
+            await repository.get_project("p1")
+        await repository.close()
+
+    asyncio.run(scenario())
+
+
+def test_supabase_requests_are_bounded_by_the_semaphore():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200, json=[{"id": "p1"}])
+
+    async def scenario():
+        repository = supabase(handler, max_concurrency=2)
+        await asyncio.gather(*(repository.get_project("p1") for _ in range(8)))
+        await repository.close()
+
+    asyncio.run(scenario())
+    assert peak == 2
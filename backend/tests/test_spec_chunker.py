@@ -0,0 +1,44 @@
+from spec_chunker import build_chunks, file_level_source, split_solidity_source
+
+FUNCTIONS = "\n".join(
+    f"    function f{i}(uint a) external onlyOwner {{ total += a * {i}; }}" for i in range(30)
+)
+
+SOURCE = f"""pragma solidity ^0.8.20;
+
+struct Position {{ uint size; address owner; }}
+type Price is uint256;
+function helper(uint x) pure returns (uint) {{ return x + 1; }}
+
+contract Vault {{
+    uint total;
+    address owner;
+    modifier onlyOwner() {{ require(msg.sender == owner); _; }}
+{FUNCTIONS}
+}}
+"""
+
+
+def test_modifiers_stay_in_the_unit_header():
+    unit = split_solidity_source(SOURCE)[0]
+    assert len(unit["functions"]) == 30
+    assert "modifier onlyOwner()" in unit["header"]
+    assert not any("modifier" in function for function in unit["functions"])
+
+
+def test_file_level_declarations_are_kept():
+    file_level = file_level_source(SOURCE)
+    assert "struct Position" in file_level
+    assert "type Price" in file_level
+    assert "function helper" in file_level
+    assert "contract Vault" not in file_level
+
+
+def test_every_chunk_carries_modifiers_and_file_level_declarations():
+    chunks = build_chunks(SOURCE, 400)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert "modifier onlyOwner()" in chunk["code"]
+        assert "struct Position" in chunk["code"]
+        assert "function helper" in chunk["code"]
+    assert sum(chunk["code"].count("function f") for chunk in chunks) == 30